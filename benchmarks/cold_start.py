@@ -0,0 +1,104 @@
+"""
+Cold-start benchmark of the ingestion Lambda.
+
+Every sample runs in a fresh interpreter, as a new Lambda container would,
+and times the module imports done during init. Samples are taken both with
+the bytecode cache warm and with an empty cache, which is what a deployment
+package without __pycache__ directories gets. Pass a PDF to also time the
+first text extraction, which loads the lazily imported font tables:
+
+    python benchmarks/cold_start.py [--runs 10] [--profile] [sample.pdf]
+
+Importing lambda_function needs boto3; without it only pypdf is measured.
+"""
+
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_package")
+
+TIMED = """
+import sys, time
+t = time.perf_counter()
+import {module}
+init = time.perf_counter() - t
+first = 0.0
+if len(sys.argv) > 1:
+    from pypdf import PdfReader
+    t = time.perf_counter()
+    PdfReader(sys.argv[1]).pages[0].extract_text()
+    first = time.perf_counter() - t
+print(init, first)
+"""
+
+
+def sample(module, pdf, pycache_prefix, profile=False):
+    env = dict(os.environ, PYTHONPATH=PACKAGE_DIR)
+    env.setdefault("DYNAMODB_TABLE", "benchmark")
+    env.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    if pycache_prefix:
+        env["PYTHONPYCACHEPREFIX"] = pycache_prefix
+    cmd = [sys.executable]
+    if profile:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", TIMED.format(module=module)]
+    if pdf:
+        cmd.append(pdf)
+    result = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+    init, first = map(float, result.stdout.split())
+    return init, first, result.stderr
+
+
+def top_imports(importtime_log, count=10):
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("pdf", nargs="?", help="PDF whose first page is extracted after init")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--profile", action="store_true", help="print the slowest imports")
+    args = parser.parse_args()
+
+    modules = ["pypdf"]
+    if importlib.util.find_spec("boto3") is not None:
+        modules.append("lambda_function")
+    else:
+        print("boto3 not installed: measuring pypdf only")
+
+    for module in modules:
+        sample(module, None, None)  # populate the bytecode cache
+        for label in ("warm bytecode", "no bytecode"):
+            inits, firsts = [], []
+            for _ in range(args.runs):
+                with tempfile.TemporaryDirectory() as empty_cache:
+                    init, first, _ = sample(module, args.pdf, empty_cache if label == "no bytecode" else None)
+                inits.append(init)
+                firsts.append(first)
+            line = (
+                f"{module:16} {label:14} init median {statistics.median(inits) * 1000:7.1f} ms"
+                f"  min {min(inits) * 1000:7.1f} ms"
+            )
+            if args.pdf:
+                line += f"  first page {statistics.median(firsts) * 1000:7.1f} ms"
+            print(line)
+        if args.profile:
+            _, _, log = sample(module, args.pdf, None, profile=True)
+            for cumulative, name in top_imports(log):
+                print(f"    {cumulative / 1000:7.1f} ms {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of FlateDecode predictor decoding.
+
+Compares the row-based decoders in pypdf.filters with the previous
+byte-by-byte implementation, which is kept below as the reference, and
+checks that both return the same bytes. Run with and without NumPy
+installed to time both fast paths:
+
+    python benchmarks/predictors.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_package"))
+
+from pypdf import filters  # noqa: E402
+
+
+def reference_png(data, columns, rowlength):
+    output = []
+    prev_rowdata = (0,) * rowlength
+    bpp = (rowlength - 1) // columns
+    for row in range(0, len(data), rowlength):
+        rowdata = list(data[row : row + rowlength])
+        filter_byte = rowdata[0]
+        if filter_byte == 1:
+            for i in range(bpp + 1, rowlength):
+                rowdata[i] = (rowdata[i] + rowdata[i - bpp]) % 256
+        elif filter_byte == 2:
+            for i in range(1, rowlength):
+                rowdata[i] = (rowdata[i] + prev_rowdata[i]) % 256
+        elif filter_byte == 3:
+            for i in range(1, bpp + 1):
+                rowdata[i] = (rowdata[i] + prev_rowdata[i] // 2) % 256
+            for i in range(bpp + 1, rowlength):
+                rowdata[i] = (rowdata[i] + (rowdata[i - bpp] + prev_rowdata[i]) // 2) % 256
+        elif filter_byte == 4:
+            for i in range(1, bpp + 1):
+                rowdata[i] = (rowdata[i] + prev_rowdata[i]) % 256
+            for i in range(bpp + 1, rowlength):
+                left = rowdata[i - bpp]
+                up = prev_rowdata[i]
+                up_left = prev_rowdata[i - bpp]
+                p = left + up - up_left
+                dist_left = abs(p - left)
+                dist_up = abs(p - up)
+                dist_up_left = abs(p - up_left)
+                if dist_left <= dist_up and dist_left <= dist_up_left:
+                    paeth = left
+                elif dist_up <= dist_up_left:
+                    paeth = up
+                else:
+                    paeth = up_left
+                rowdata[i] = (rowdata[i] + paeth) % 256
+        prev_rowdata = tuple(rowdata)
+        output.extend(rowdata[1:])
+    return bytes(output)
+
+
+def reference_tiff(data, columns, rowlength):
+    bpp = rowlength // columns
+    str_data = bytearray(data)
+    for i in range(len(str_data)):
+        if i % rowlength >= bpp:
+            str_data[i] = (str_data[i] + str_data[i - bpp]) % 256
+    return bytes(str_data)
+
+
+def make_rows(rnd, nrows, rowlength, filter_bytes):
+    return b"".join(
+        bytes([rnd.choice(filter_bytes)]) + rnd.randbytes(rowlength - 1)
+        for _ in range(nrows)
+    )
+
+
+def main():
+    rnd = random.Random(0)
+    cases = [
+        # name, decoder, reference, data, columns, rowlength
+        ("xref stream, Up rows", filters.FlateDecode._decode_png_prediction,
+         reference_png, make_rows(rnd, 20_000, 6, [2]), 5, 6),
+        ("RGB image, Sub/Up rows", filters.FlateDecode._decode_png_prediction,
+         reference_png, make_rows(rnd, 600, 2401, [0, 1, 2]), 800, 2401),
+        ("RGB image, all PNG filters", filters.FlateDecode._decode_png_prediction,
+         reference_png, make_rows(rnd, 300, 2401, [0, 1, 2, 3, 4]), 800, 2401),
+        ("RGB image, TIFF predictor", filters.FlateDecode._decode_tiff_prediction,
+         reference_tiff, rnd.randbytes(600 * 2400), 800, 2400),
+    ]
+    np = filters._numpy()
+    print(f"numpy: {np.__version__ if np is not None else 'not installed'}")
+    for name, decoder, reference, data, columns, rowlength in cases:
+        assert decoder(data, columns, rowlength) == reference(data, columns, rowlength), name
+        old = min(timeit.repeat(lambda: reference(data, columns, rowlength), number=1, repeat=3))
+        new = min(timeit.repeat(lambda: decoder(data, columns, rowlength), number=1, repeat=3))
+        print(f"{name:28} {old * 1000:9.1f} ms -> {new * 1000:8.1f} ms  ({old / new:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,9 +8,13 @@ import time
 import json
 import re
 from pycognito import Cognito
-from boto3.dynamodb.conditions import Key
+import threading
+from collections import OrderedDict
+from boto3.dynamodb.conditions import Key, Attr
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
+from normalize import normalize_rows, record_id
+from summaries import get_summaries
 
 REGION = os.environ.get('AWS_REGION', 'us-east-1')
 USER_POOL_ID = os.environ.get('COGNITO_USER_POOL_ID', '')
@@ -18,9 +22,18 @@ CLIENT_ID = os.environ.get('COGNITO_CLIENT_ID', '')
 TABLE_NAME = os.environ.get('DYNAMODB_TABLE', 'RootHealth_Stats')
 SUPPLEMENTS_TABLE = "RootHealth_Supplements"
 RELATIONSHIPS_TABLE = "RootHealth_Relationships"
+SUMMARY_TABLE = os.environ.get('SUMMARY_TABLE', 'RootHealth_Summaries')
 BUCKET_NAME = os.environ.get('S3_BUCKET_NAME', 'roothealth-raw-files-adric')
 ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin')
 ADMIN_PASS = os.environ.get('ADMIN_PASSWORD', 'root123')
+DATA_CACHE_TTL = int(os.environ.get('DATA_CACHE_TTL', '300'))
+DATA_CACHE_USERS = int(os.environ.get('DATA_CACHE_USERS', '64'))
+# GSI on (user_id, written_at); without it deltas are filtered from the full query
+STATS_TIME_INDEX = os.environ.get('STATS_TIME_INDEX', 'user_written_at')
+# After an upload, every rerun fetches the delta for this long (ingestion is async)
+UPLOAD_REFRESH_WINDOW = int(os.environ.get('UPLOAD_REFRESH_WINDOW', '180'))
+# Every this many TTLs the delta is replaced by a full load, which drops deleted rows
+FULL_RELOAD_EVERY = int(os.environ.get('FULL_RELOAD_EVERY', '12'))
 
 st.set_page_config(page_title="RootHealth OS", page_icon="🧬", layout="wide", initial_sidebar_state="expanded")
 
@@ -47,6 +60,7 @@ dynamodb = boto3.resource('dynamodb', region_name=REGION)
 table = dynamodb.Table(TABLE_NAME)
 supp_table = dynamodb.Table(SUPPLEMENTS_TABLE)
 rel_table = dynamodb.Table(RELATIONSHIPS_TABLE)
+summary_table = dynamodb.Table(SUMMARY_TABLE)
 s3 = boto3.client('s3', region_name=REGION)
 bedrock = boto3.client('bedrock-runtime', region_name=REGION)
 cognito_client = boto3.client('cognito-idp', region_name=REGION)
@@ -120,14 +134,29 @@ def get_user_profile(uid):
     try: return table.get_item(Key={'user_id': uid, 'record_id': 'USER_PROFILE'}).get('Item', {})
     except: return {}
 
-def update_manual_data(uid, df_changes):
-    for index, row in df_changes.iterrows():
+def same_cell(a, b):
+    return (pd.isna(a) and pd.isna(b)) if pd.isna(a) or pd.isna(b) else a == b
+
+def update_manual_data(uid, df_changes, df_before):
+    # Same normalization as the ingestor. Only rows that differ from the stored
+    # ones are written; a row whose value is unchanged keeps its original_value
+    before = {r['record_id']: r for r in df_before.to_dict('records')} if not df_before.empty else {}
+    for rec in df_changes.to_dict('records'):
         try:
-            ts = str(int(row['Date'].timestamp())) if pd.notnull(row['Date']) else str(int(time.time()))
-            rec_id = row.get('record_id')
-            if not rec_id or pd.isna(rec_id): rec_id = f"{str(row['metric']).replace(' ', '_')}_{ts}"
-            table.put_item(Item={'user_id': uid, 'record_id': rec_id, 'metric': row['metric'], 'value': str(row['value']), 'unit': row['unit'], 'upload_timestamp': ts, 'source_file': 'Manual_Edit'})
-        except Exception as e: st.error(f"Failed: {e}")
+            rec_id = rec.get('record_id')
+            if not isinstance(rec_id, str) or not rec_id: rec_id = None
+            old = before.get(rec_id)
+            if old is not None and all(same_cell(rec.get(c), old.get(c)) for c in ('metric', 'value', 'unit', 'Date')): continue
+            row = normalize_rows([{**rec, 'date': rec.get('Date')}])[0]
+            if old is not None and same_cell(rec.get('value'), old.get('value')) and isinstance(old.get('original_value'), str):
+                row = row._replace(original_value=old['original_value'])
+            table.put_item(Item=row.item(uid, rec_id or record_id(row.metric, row.timestamp), 'Manual_Edit'))
+        except Exception as e: st.error(f"Failed to save {rec.get('metric')}: {e}")
+
+def load_summaries(uid):
+    # Maintained by the ingestor Lambda from the stats table's stream
+    try: return get_summaries(summary_table, uid)
+    except: return {}
 
 def admin_get_all_users():
     try:
@@ -189,9 +218,97 @@ def run_ai_coach(user_data, user_stack, user_profile):
     try: return json.loads(bedrock.invoke_model(modelId="anthropic.claude-3-5-sonnet-20240620-v1:0", body=body)['body'].read())['content'][0]['text']
     except Exception as e: return f"AI Error: {e}"
 
+def query_all(tbl, **kwargs):
+    # A query returns at most 1 MB; follow LastEvaluatedKey for the rest
+    items = []
+    while True:
+        resp = tbl.query(**kwargs)
+        items.extend(resp.get('Items', []))
+        if 'LastEvaluatedKey' not in resp: return items
+        kwargs['ExclusiveStartKey'] = resp['LastEvaluatedKey']
+
 def get_data(uid):
-    try: return [i for i in table.query(KeyConditionExpression=Key('user_id').eq(uid))['Items']]
-    except: return []
+    # Raises on failure: an empty list would be cached as the user's history
+    return query_all(table, KeyConditionExpression=Key('user_id').eq(uid))
+
+def get_data_since(uid, since):
+    # Rows written (or rewritten) after `since`, by their written_at stamp.
+    # The index reads only those rows; the filter still reads the whole history
+    if STATS_TIME_INDEX:
+        return query_all(table, IndexName=STATS_TIME_INDEX, KeyConditionExpression=Key('user_id').eq(uid) & Key('written_at').gt(since))
+    return query_all(table, KeyConditionExpression=Key('user_id').eq(uid), FilterExpression=Attr('written_at').gt(since))
+
+def to_frame(items):
+    df = pd.DataFrame(items)
+    if not df.empty:
+        df['value'] = pd.to_numeric(df['value'], errors='coerce')
+        df['Date'] = pd.to_datetime(pd.to_numeric(df['upload_timestamp'].fillna(0)), unit='s')
+        df = df.dropna(subset=['value']).sort_values(by='Date')
+    return df
+
+def metric_view(df):
+    # metric -> Date, value and unit arrays in Date order, from one groupby over
+    # the (already Date-sorted) frame instead of a mask and sort per widget
+    if df.empty: return {}
+    dates, values, units = df['Date'].to_numpy(), df['value'].to_numpy(), df['unit'].to_numpy()
+    return {m: {'Date': dates[idx], 'value': values[idx], 'unit': units[idx]} for m, idx in df.groupby('metric').indices.items()}
+
+@st.cache_resource
+def frame_cache():
+    # Shared by all sessions and reruns: uid -> {'df', 'loaded', 'full_loaded', 'high_water', 'refresh_until'}
+    return OrderedDict(), threading.Lock()
+
+# The next delta starts this far below the newest written_at read so far: rows
+# stamped by other writers' clocks, or not yet visible in the index, are read again
+HIGH_WATER_MARGIN = 60
+
+def load_user_frame(uid):
+    # Full load once and every FULL_RELOAD_EVERY TTLs, otherwise only the delta
+    # after the TTL or an invalidation, merged into the cached frame (a rewritten
+    # record replaces its old row)
+    cache, lock = frame_cache()
+    with lock:
+        entry = cache.get(uid)
+        if entry is not None: cache.move_to_end(uid)
+    now = time.time()
+    ttl = 0 if entry is not None and now < entry['refresh_until'] else DATA_CACHE_TTL
+    if entry is not None and now - entry['loaded'] < ttl: return entry['df']
+    full = entry is None or now - entry['full_loaded'] >= FULL_RELOAD_EVERY * DATA_CACHE_TTL
+    try:
+        items = get_data(uid) if full else get_data_since(uid, entry['high_water'])
+    except Exception as e:
+        # Nothing is cached, so the next rerun tries again
+        st.error(f"Load Error: {e}")
+        return entry['df'] if entry else to_frame([])
+    df = to_frame(items) if full else merge_frame(entry['df'], to_frame(items))
+    seen = max((int(i['written_at']) for i in items if 'written_at' in i), default=None)
+    high_water = 0 if full else entry['high_water']
+    if seen is not None: high_water = max(high_water, seen - HIGH_WATER_MARGIN)
+    with lock:
+        refresh_until = cache[uid]['refresh_until'] if uid in cache else 0
+        cache[uid] = {'df': df, 'loaded': now, 'full_loaded': now if full else entry['full_loaded'], 'high_water': high_water, 'refresh_until': refresh_until}
+        while len(cache) > DATA_CACHE_USERS: cache.popitem(last=False)
+    return df
+
+def merge_frame(df, delta):
+    if delta.empty: return df
+    return pd.concat([df, delta]).drop_duplicates(subset='record_id', keep='last').sort_values(by='Date')
+
+def update_user_frame(uid, items):
+    # After a write of known items: merge them into the cached frame, no reload
+    cache, lock = frame_cache()
+    with lock:
+        if uid in cache: cache[uid]['df'] = merge_frame(cache[uid]['df'], to_frame(items))
+
+def invalidate_user_frame(uid, full=False, watch=0):
+    # After a write: the next load fetches the delta, or everything if full;
+    # with watch, so do all loads in the next `watch` seconds
+    cache, lock = frame_cache()
+    with lock:
+        if full: cache.pop(uid, None)
+        elif uid in cache:
+            cache[uid]['loaded'] = 0
+            cache[uid]['refresh_until'] = max(cache[uid]['refresh_until'], time.time() + watch)
 
 if 'authenticated' not in st.session_state: st.session_state.authenticated = False
 if 'username' not in st.session_state: st.session_state.username = None
@@ -236,7 +353,8 @@ if st.session_state.is_admin and not st.session_state.impersonate_id:
         target_user = st.selectbox("Select User", all_users)
         if target_user:
             u_info = admin_get_user_info(target_user)
-            u_data = get_data(target_user)
+            try: u_data = get_data(target_user)
+            except Exception as e: st.error(f"Load Error: {e}"); u_data = []
             with st.expander(f"Inspector: {target_user}", expanded=True):
                 col_a, col_b = st.columns(2)
                 col_a.write(f"**Cognito Status:** {u_info.get('email_verified', 'Unknown')}")
@@ -245,7 +363,7 @@ if st.session_state.is_admin and not st.session_state.impersonate_id:
                 if col_b.button("👁️ IMPERSONATE USER", type="primary"): st.session_state.impersonate_id = target_user; st.rerun()
             st.divider()
             if st.button("🗑️ NUKE USER (DATA + LOGIN)", type="secondary"):
-                if admin_nuke_user(target_user): st.success("User Terminated"); time.sleep(2); st.rerun()
+                if admin_nuke_user(target_user): invalidate_user_frame(target_user, full=True); st.success("User Terminated"); time.sleep(2); st.rerun()
     st.stop()
 
 active_user = st.session_state.impersonate_id if st.session_state.impersonate_id else st.session_state.username
@@ -266,18 +384,18 @@ with st.sidebar:
         energy = c3.slider("Energy", 1, 10, 5)
         stress = c4.slider("Stress", 1, 10, 5)
         if st.form_submit_button("Save Log"):
-            ts = str(int(time.time()))
-            for n,v,u in [("Body Weight",w,"lbs"),("Sleep Duration",sleep,"hrs"),("Energy Level",energy,"/10"),("Stress Level",stress,"/10")]:
-                table.put_item(Item={'user_id': active_user, 'record_id': f"{n.replace(' ','_')}_{ts}", 'metric': n, 'value': str(v), 'unit': u, 'upload_timestamp': ts, 'source_file': 'Daily_Log'})
-            st.success("Logged!"); time.sleep(1); st.rerun()
+            ts = int(time.time())
+            rows = normalize_rows([{'metric': n, 'value': v, 'unit': u, 'date': ts} for n,v,u in [("Body Weight",w,"lbs"),("Sleep Duration",sleep,"hrs"),("Energy Level",energy,"/10"),("Stress Level",stress,"/10")]])
+            items = [row.item(active_user, record_id(row.metric, ts), 'Daily_Log') for row in rows]
+            # All four rows in one BatchWriteItem
+            with table.batch_writer() as batch:
+                for item in items: batch.put_item(Item=item)
+            update_user_frame(active_user, items)
+            st.toast("Logged!"); st.rerun()
     if not st.session_state.impersonate_id and st.button("Log Out"): st.session_state.authenticated = False; st.rerun()
 
-raw_data = get_data(active_user)
-df = pd.DataFrame(raw_data)
-if not df.empty:
-    df['value'] = pd.to_numeric(df['value'], errors='coerce')
-    df['Date'] = pd.to_datetime(pd.to_numeric(df['upload_timestamp'].fillna(0)), unit='s')
-    df = df.dropna(subset=['value']).sort_values(by='Date')
+df = load_user_frame(active_user)
+views = metric_view(df)
 
 prof = get_user_profile(active_user)
 
@@ -285,7 +403,7 @@ if page == "Dashboard":
     st.header("Dashboard")
     if df.empty: st.info("👋 Welcome! Upload labs to start.")
     else:
-        all_metrics = sorted(df['metric'].unique().tolist())
+        all_metrics = list(views)
         saved_faves = get_user_preferences(active_user)
         current_faves = [m for m in saved_faves if m in all_metrics]
         with st.popover("⚙️ Customize Widgets"):
@@ -293,17 +411,32 @@ if page == "Dashboard":
             if st.button("Save Layout"): save_user_preferences(active_user, new_faves); st.rerun()
         if current_faves:
             cols = st.columns(3)
+            summaries = load_summaries(active_user)
             for i, metric in enumerate(current_faves):
-                m_df = df[df['metric'] == metric].sort_values(by='Date')
-                if m_df.empty: continue
-                curr = m_df.iloc[-1]
-                val, unit = curr['value'], curr['unit']
+                s, m = summaries.get(metric), views.get(metric)
+                # The stream updates summaries a moment after a write; rows this
+                # session just wrote (e.g. the Daily Bio-Log) are already in the frame
+                if s is not None and m is not None and pd.Timestamp(m['Date'][-1]).timestamp() > int(s['latest']['ts']): s = None
+                if s is not None:
+                    # Latest and previous points from the summary item, no history scan
+                    curr, prev = s['latest'], s.get('previous')
+                    val, unit = float(curr['value']), s.get('unit', '')
+                    delta, pct, t_str = 0, 0, "New"
+                    if prev:
+                        delta = float(s['delta'])
+                        pct = (delta / float(prev['value'])) * 100 if prev['value'] != 0 else 0
+                        t_str = get_time_diff(pd.to_datetime(int(curr['ts']), unit='s'), pd.to_datetime(int(prev['ts']), unit='s'))
+                    with cols[i % 3]: render_metric_card(metric, val, unit, delta, pct, t_str)
+                    continue
+                # No summary yet, or one behind the frame
+                if m is None: continue
+                val, unit = m['value'][-1], m['unit'][-1]
                 delta, pct, t_str = 0, 0, "New"
-                if len(m_df) > 1:
-                    prev = m_df.iloc[-2]
-                    delta = val - prev['value']
-                    pct = (delta / prev['value']) * 100 if prev['value'] != 0 else 0
-                    t_str = get_time_diff(curr['Date'], prev['Date'])
+                if len(m['value']) > 1:
+                    prev = m['value'][-2]
+                    delta = val - prev
+                    pct = (delta / prev) * 100 if prev != 0 else 0
+                    t_str = get_time_diff(pd.Timestamp(m['Date'][-1]), pd.Timestamp(m['Date'][-2]))
                 with cols[i % 3]: render_metric_card(metric, val, unit, delta, pct, t_str)
         st.markdown("<br>", unsafe_allow_html=True)
         st.subheader("Consistency")
@@ -324,7 +457,7 @@ if page == "Dashboard":
         c1, c2 = st.columns([1, 2])
         with c1:
             sel = st.selectbox("Select Metric", all_metrics)
-            latest = df[df['metric'] == sel].iloc[-1]['value']
+            latest = views[sel]['value'][-1]
             fig = go.Figure(go.Indicator(mode="gauge+number", value=latest, gauge={'axis': {'range': [0, latest*1.5]}, 'bar': {'color': "white"}, 'steps': [{'range': [0, latest*1.5], 'color': "#1A1C24"}]}))
             ranges = get_optimal_ranges(prof)
             if sel in ranges:
@@ -333,7 +466,7 @@ if page == "Dashboard":
             fig.update_layout(height=250, margin=dict(l=20,r=20,t=20,b=20), paper_bgcolor="rgba(0,0,0,0)", font={'color': "white"})
             st.plotly_chart(fig, use_container_width=True)
         with c2:
-            fig = px.line(df[df['metric']==sel], x="Date", y="value", markers=True)
+            fig = px.line(x=views[sel]['Date'], y=views[sel]['value'], labels={'x': 'Date', 'y': 'value'}, markers=True)
             fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font_color="#8F9BB3", xaxis=dict(showgrid=False), yaxis=dict(showgrid=True, gridcolor="#2C2F3A"), height=300)
             fig.update_traces(line_color="#4CAF50", line_width=3)
             if sel in ranges: fig.add_hrect(y0=ranges[sel]['opt_min'], y1=ranges[sel]['opt_max'], fillcolor="#00E676", opacity=0.1, layer="below", line_width=0)
@@ -349,12 +482,14 @@ elif page == "Data Manager":
             for i, f in enumerate(files):
                 s3.put_object(Bucket=BUCKET_NAME, Key=f"uploads/{active_user}/{f.name}", Body=f.getvalue())
                 bar.progress((i+1)/len(files))
-            st.success("Processing!")
+            invalidate_user_frame(active_user, watch=UPLOAD_REFRESH_WINDOW)
+            st.success("Processing! Results appear here within a few minutes.")
+        if st.button("🔄 Refresh"): invalidate_user_frame(active_user, full=True); st.rerun()
     with t2:
         if not df.empty: st.download_button("Download CSV", df.to_csv(index=False).encode('utf-8'), "data.csv")
         edit_df = df[['metric', 'value', 'unit', 'Date', 'record_id']].copy() if not df.empty else pd.DataFrame(columns=['metric', 'value', 'unit', 'Date', 'record_id'])
         edited = st.data_editor(edit_df, num_rows="dynamic", use_container_width=True, hide_index=True)
-        if st.button("Save"): update_manual_data(active_user, edited); st.success("Updated!"); time.sleep(1); st.rerun()
+        if st.button("Save"): update_manual_data(active_user, edited, df); invalidate_user_frame(active_user); st.success("Updated!"); time.sleep(1); st.rerun()
 
 elif page == "AI Coach":
     st.header("Intelligence Center")
@@ -362,11 +497,10 @@ elif page == "AI Coach":
     with c1:
         if df.empty: st.warning("No data.")
         else:
-            all_m = df['metric'].unique()
+            all_m = list(views)
             m1 = st.selectbox("Left Axis", all_m, index=0)
             m2 = st.selectbox("Right Axis", all_m, index=1 if len(all_m)>1 else 0)
-            d1 = df[df['metric'] == m1].sort_values('Date')
-            d2 = df[df['metric'] == m2].sort_values('Date')
+            d1, d2 = views[m1], views[m2]
             fig = go.Figure()
             fig.add_trace(go.Scatter(x=d1['Date'], y=d1['value'], name=m1, mode='lines+markers'))
             fig.add_trace(go.Scatter(x=d2['Date'], y=d2['value'], name=m2, mode='lines+markers', yaxis='y2'))
@@ -0,0 +1 @@
+lambda_package/lambda_function.py
\ No newline at end of file
@@ -1,36 +1,349 @@
 import boto3
 import os
+import hashlib
+import io
 import json
+import random
 import urllib.parse
 import time
-import io
 import re
-from datetime import datetime
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectionClosedError, EndpointConnectionError, ReadTimeoutError
 from pypdf import PdfReader
+from pypdf.generic import IndirectObject
+from normalize import normalize_rows, record_id
+from summaries import apply_changes, same_point, to_row
+
+TABLE_NAME = os.environ['DYNAMODB_TABLE']
+MAX_CONCURRENCY = int(os.environ.get('MAX_CONCURRENCY', '8'))
+# Records in flight are also capped by the function's memory: init takes about
+# BASE_MEMORY_MB, and each record's PdfReader, decoded streams and share of the
+# block cache up to RECORD_MEMORY_MB
+BASE_MEMORY_MB = 80
+RECORD_MEMORY_MB = int(os.environ.get('RECORD_MEMORY_MB', '24'))
+FUNCTION_MEMORY_MB = int(os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE', '0'))
+if FUNCTION_MEMORY_MB:
+    MAX_CONCURRENCY = max(1, min(MAX_CONCURRENCY, (FUNCTION_MEMORY_MB - BASE_MEMORY_MB) // RECORD_MEMORY_MB))
+DEDUP_TABLE = os.environ.get('DEDUP_TABLE')
+# Per-metric latest/previous/min/max items the dashboard cards read, kept up
+# to date from the stats table's stream
+SUMMARY_TABLE = os.environ.get('SUMMARY_TABLE')
+DEDUP_TTL_DAYS = int(os.environ.get('DEDUP_TTL_DAYS', '90'))
+MAX_CHUNK_CHARS = int(os.environ.get('MAX_CHUNK_CHARS', '12000'))
+BEDROCK_CONCURRENCY = int(os.environ.get('BEDROCK_CONCURRENCY', '4'))
+FAST_PATH_MIN_CONFIDENCE = float(os.environ.get('FAST_PATH_MIN_CONFIDENCE', '0.9'))
+MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-haiku-20240307-v1:0')
+# Point the ingestor at a local stub instead of Bedrock, e.g. http://127.0.0.1:8080
+BEDROCK_ENDPOINT_URL = os.environ.get('BEDROCK_ENDPOINT_URL') or None
+BEDROCK_READ_TIMEOUT = int(os.environ.get('BEDROCK_READ_TIMEOUT', '60'))
+# Bedrock retries stop when less than this is left of the invocation
+BEDROCK_TIME_MARGIN_MS = int(os.environ.get('BEDROCK_TIME_MARGIN_MS', '15000'))
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', '256'))
+RANGE_BLOCK_SIZE = int(os.environ.get('RANGE_BLOCK_SIZE', str(256 * 1024)))
+# Block cache budget shared by the MAX_CONCURRENCY records read at once
+RANGE_CACHE_MB = int(os.environ.get('RANGE_CACHE_MB', '16'))
+RANGE_CACHE_BLOCKS = int(os.environ.get('RANGE_CACHE_BLOCKS', '0')) or max(
+    4, RANGE_CACHE_MB * 1024 * 1024 // RANGE_BLOCK_SIZE // max(1, MAX_CONCURRENCY))
+# Image-only (scanned) uploads are sent here instead of being parsed
+OCR_QUEUE_URL = os.environ.get('OCR_QUEUE_URL')
+WRITE_MAX_ATTEMPTS = int(os.environ.get('WRITE_MAX_ATTEMPTS', '8'))
+# Skip rows already written from the same file content instead of overwriting them
+CONDITIONAL_WRITES = os.environ.get('CONDITIONAL_WRITES', '').lower() in ('1', 'true', 'yes')
+
+BATCH_WRITE_SIZE = 25  # BatchWriteItem limit
+THROTTLE_ERRORS = {'ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded'}
+BEDROCK_RETRY_ERRORS = {
+    'ThrottlingException', 'ServiceUnavailableException', 'ModelNotReadyException',
+    'ModelTimeoutException', 'InternalServerException', 'ConnectionError',
+}
+BEDROCK_CONNECTION_ERRORS = (ReadTimeoutError, ConnectionClosedError, EndpointConnectionError)
+# Read timeouts used for calls that would otherwise outlast the invocation
+BEDROCK_SHORT_TIMEOUTS = (30, 20, 10, 5, 2, 1)
 
+# Clients and worker pools are created once per container, during init,
+# and reused by every warm invocation
 s3 = boto3.client('s3')
-bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
-dynamodb = boto3.resource('dynamodb')
+sqs = boto3.client('sqs')
 
-TABLE_NAME = os.environ['DYNAMODB_TABLE']
+def make_bedrock_client(read_timeout):
+    return boto3.client(
+        'bedrock-runtime',
+        region_name='us-east-1',
+        endpoint_url=BEDROCK_ENDPOINT_URL,
+        config=Config(
+            # One connection per Bedrock worker thread, kept alive between calls
+            max_pool_connections=max(10, BEDROCK_CONCURRENCY),
+            tcp_keepalive=True,
+            connect_timeout=min(5, read_timeout),
+            read_timeout=read_timeout,
+            # One attempt per call: invoke_model retries within the time budget
+            retries={'mode': 'standard', 'total_max_attempts': 1},
+        ),
+    )
 
-def extract_text_from_pdf(bucket, key):
-    print(f"📄 Extracting text from {key}...")
-    try:
-        response = s3.get_object(Bucket=bucket, Key=key)
-        file_content = response['Body'].read()
-        
-        pdf = PdfReader(io.BytesIO(file_content))
-        full_text = ""
+bedrock = make_bedrock_client(BEDROCK_READ_TIMEOUT)
+dynamodb = boto3.client('dynamodb')
+
+_local = threading.local()
+invocation_deadline = None
+# Pool threads outlive invocations, so their DynamoDB resources are kept too
+record_pool = ThreadPoolExecutor(max_workers=max(1, MAX_CONCURRENCY))
+bedrock_pool = ThreadPoolExecutor(max_workers=max(1, BEDROCK_CONCURRENCY))
+
+class S3RangeReader(io.RawIOBase):
+    # Seekable, read-only view of an S3 object that fetches fixed-size blocks
+    # with ranged GETs and keeps the most recently used ones. PdfReader starts
+    # at the trailer and then seeks to the objects it needs, so page text is
+    # read without transferring image streams and other untouched data.
+
+    def __init__(self, client, bucket, key, block_size=None, max_blocks=None):
+        super().__init__()
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.block_size = block_size or RANGE_BLOCK_SIZE
+        self.max_blocks = max_blocks or RANGE_CACHE_BLOCKS
+        head = client.head_object(Bucket=bucket, Key=key, ChecksumMode='ENABLED')
+        self.size = head['ContentLength']
+        # Identifies the content without reading it: the SHA-256 checksum when the
+        # upload stored one, else the ETag (the MD5 of single-part uploads)
+        checksum = head.get('ChecksumSHA256')
+        self.content_id = f"sha256:{checksum}" if checksum else f"etag:{head['ETag'].strip(chr(34))}:{self.size}"
+        self.position = 0
+        self.blocks = OrderedDict()
+        self.requests = 0
+        self.bytes_fetched = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"invalid whence ({whence})")
+        if position < 0:
+            raise OSError(f"negative seek position {position}")
+        self.position = position
+        return position
+
+    def readinto(self, buffer):
+        end = min(self.position + len(buffer), self.size)
+        if end <= self.position:
+            return 0
+        first = self.position // self.block_size
+        last = (end - 1) // self.block_size
+        self._fetch(first, last)
+        view = memoryview(buffer)
+        written = 0
+        for index in range(first, last + 1):
+            block = self.blocks[index]
+            start = max(self.position, index * self.block_size) - index * self.block_size
+            stop = min(end - index * self.block_size, len(block))
+            view[written:written + stop - start] = block[start:stop]
+            written += stop - start
+        self.position = end
+        return written
+
+    def _fetch(self, first, last):
+        # Missing blocks are fetched with one request per contiguous run
+        missing = []
+        for index in range(first, last + 1):
+            if index in self.blocks:
+                self.blocks.move_to_end(index)
+            else:
+                missing.append(index)
+        runs = []
+        for index in missing:
+            if runs and runs[-1][1] == index - 1:
+                runs[-1][1] = index
+            else:
+                runs.append([index, index])
+        for run_first, run_last in runs:
+            start = run_first * self.block_size
+            stop = min((run_last + 1) * self.block_size, self.size) - 1
+            data = self.client.get_object(Bucket=self.bucket, Key=self.key, Range=f"bytes={start}-{stop}")['Body'].read()
+            self.requests += 1
+            self.bytes_fetched += len(data)
+            for index in range(run_first, run_last + 1):
+                offset = (index - run_first) * self.block_size
+                self.blocks[index] = data[offset:offset + self.block_size]
+        while len(self.blocks) > max(self.max_blocks, last - first + 1):
+            self.blocks.popitem(last=False)
+
+def has_images(resources, seen=None):
+    # Image XObjects in a resource dictionary, including inside form XObjects
+    seen = set() if seen is None else seen
+    xobjects = resources.get_object().get('/XObject') if resources else None
+    if not xobjects:
+        return False
+    for ref in xobjects.get_object().values():
+        marker = (ref.idnum, ref.generation) if isinstance(ref, IndirectObject) else id(ref)
+        if marker in seen:
+            continue
+        seen.add(marker)
+        xobj = ref.get_object()
+        if xobj.get('/Subtype') == '/Image':
+            return True
+        if has_images(xobj.get('/Resources'), seen):
+            return True
+    return False
+
+def scan_pages(fh):
+    # Classifies pages from their resources only, without parsing content
+    # streams: "text" if any font is used, "image" if only images, else "empty"
+    kinds = []
+    with PdfReader(fh, lazy_stream_threshold=RANGE_BLOCK_SIZE // 4) as pdf:
         for page in pdf.pages:
-            text = page.extract_text()
+            try:
+                embedded, unembedded = page._get_fonts()
+                if embedded or unembedded:
+                    kinds.append("text")
+                else:
+                    kinds.append("image" if has_images(page.get('/Resources')) else "empty")
+            except Exception:
+                kinds.append("text")  # let the full extraction decide
+    return kinds
+
+def queue_for_ocr(bucket, key, content_id, pages):
+    if not OCR_QUEUE_URL:
+        print(f"🖼️ {key} is image-only; no OCR queue configured")
+        return "Skipped image-only PDF"
+    sqs.send_message(QueueUrl=OCR_QUEUE_URL, MessageBody=json.dumps({
+        'bucket': bucket, 'key': key, 'content_id': content_id, 'pages': pages,
+    }))
+    print(f"🖼️ {key} is image-only; queued {pages} pages for OCR")
+    return "Queued for OCR"
+
+def iter_pdf_text(fh, extraction_mode="layout", page_numbers=None):
+    # S3 ranges -> block cache -> one chunk per page. Large streams (scanned
+    # images) are skipped unless decoded, so only the blocks the parser
+    # touches are transferred, and each page's content streams are dropped
+    # once its text is yielded, so memory tracks the block cache.
+    with PdfReader(fh, lazy_stream_threshold=RANGE_BLOCK_SIZE // 4) as pdf:
+        for text in pdf.iter_text_pages(page_numbers, extraction_mode=extraction_mode):
             if text:
-                full_text += text + "\n"
-        return full_text
+                yield text + "\n"
+
+def extract_text_from_pdf(fh, key, page_numbers=None):
+    # Returns the text of each non-empty page. Layout mode keeps the table
+    # columns the lab templates rely on; plain mode is the fallback.
+    print(f"📄 Extracting text from {key}...")
+    try:
+        return list(iter_pdf_text(fh, page_numbers=page_numbers))
+    except Exception as e:
+        print(f"⚠️ Layout extraction failed ({e}), retrying in plain mode")
+    try:
+        return list(iter_pdf_text(fh, extraction_mode="plain", page_numbers=page_numbers))
     except Exception as e:
         print(f"❌ PDF Read Error: {e}")
         return None
 
+# --- Rule-based fast path for known lab report layouts ---
+
+# Result lines: name, value (and flag), then units / reference range columns,
+# separated by runs of spaces in layout-mode text
+LAB_TEMPLATES = [
+    {
+        'lab': 'Quest',
+        'detect': re.compile(r'Quest\s+Diagnostics', re.I),
+        'date': re.compile(r'(?:Collected|Collection\s+Date)\s*:?\s*(\d{1,2}/\d{1,2}/\d{2,4})', re.I),
+        # TESTOSTERONE, TOTAL, MS      750        250-1100 ng/dL    EN
+        'row': re.compile(
+            r'^\s*(?P<metric>[A-Za-z][^\n]*?\S)\s{2,}(?P<value>[<>]?\d+(?:\.\d+)?)(?:\s+(?:H|L|HH|LL|HIGH|LOW))?'
+            r'(?:\s{2,}(?:[<>]=?\s*|[<>]\s*OR\s*=\s*)?\d+(?:\.\d+)?(?:\s*-\s*\d+(?:\.\d+)?)?)?'
+            r'\s+(?P<unit>[A-Za-z%\u00b5][\w%\u00b5/.^*]*(?:/[\w.]+)?)(?:\s{2,}[A-Z0-9]{2,3})?\s*$',
+            re.M,
+        ),
+        # On a row without a unit the performing-lab code ("EN") lands in the
+        # unit group; such rows are not trusted and count as misses
+        'lab_code': re.compile(r'[A-Z0-9]{2,3}'),
+    },
+    {
+        'lab': 'LabCorp',
+        'detect': re.compile(r'LabCorp|Laboratory\s+Corporation\s+of\s+America', re.I),
+        'date': re.compile(r'Date\s+Collected\s*:?\s*(\d{1,2}/\d{1,2}/\d{2,4})', re.I),
+        # Testosterone 01        750  High      ng/dL        264-916
+        'row': re.compile(
+            r'^\s*(?P<metric>[A-Za-z][^\n]*?[A-Za-z,)%])(?:\s+\d{2})?\s{2,}(?P<value>[<>]?\d+(?:\.\d+)?)'
+            r'(?:\s+(?:High|Low|Critical|Abnormal|H|L))?(?:\s{2,}[<>]?\d+(?:\.\d+)?\s+\d{1,2}/\d{1,2}/\d{2,4})?'
+            r'\s{2,}(?P<unit>[A-Za-z%\u00b5][\w%\u00b5/.^*]*(?:/[\w.]+)?)'
+            r'(?:\s{2,}[<>]?\s*\d[\d.\-\s<>=]*)?\s*$',
+            re.M,
+        ),
+    },
+]
+
+# Any line that looks like "name   number", used to measure how much of the
+# report the template understood
+RESULT_LIKE_LINE = re.compile(r'^\s*[A-Za-z][^\n]*?\S\s{2,}[<>]?\d+(?:\.\d+)?\b', re.M)
+NOT_A_RESULT = re.compile(
+    r'\b(?:date|page|phone|fax|dob|age|collected|received|reported|account|patient|specimen|'
+    r'npi|id|fasting|ordered|client|physician)\b',
+    re.I,
+)
+
+METRIC_ALIASES = [
+    (re.compile(r'^testosterone,?\s+(?:total|free and total)', re.I), "Testosterone, Total"),
+    (re.compile(r'^testosterone,?\s+free', re.I), "Testosterone, Free"),
+    (re.compile(r'^estradiol,?\s+ultrasensitive', re.I), "Estradiol, Ultrasensitive"),
+    (re.compile(r'^vitamin\s+d\b', re.I), "Vitamin D"),
+]
+
+def normalize_metric(name):
+    name = re.sub(r'\s+', ' ', name).strip(' ,')
+    for pattern, canonical in METRIC_ALIASES:
+        if pattern.search(name):
+            return canonical
+    # Quest prints names in capitals
+    return name.title() if name.isupper() else name
+
+def parse_with_template(pages):
+    # Returns (lab, rows, confidence); confidence is the share of result-like
+    # lines the template parsed, halved when no collection date is found
+    text = "".join(pages)
+    for template in LAB_TEMPLATES:
+        if not template['detect'].search(text):
+            continue
+        date_match = template['date'].search(text)
+        date = date_match.group(1) if date_match else "UNKNOWN"
+        rows = []
+        for match in template['row'].finditer(text):
+            if NOT_A_RESULT.search(match.group('metric')):
+                continue
+            if 'lab_code' in template and template['lab_code'].fullmatch(match.group('unit')):
+                continue
+            rows.append({
+                'metric': normalize_metric(match.group('metric')),
+                'value': match.group('value'),
+                'unit': match.group('unit'),
+                'date': date,
+            })
+        candidates = sum(1 for m in RESULT_LIKE_LINE.finditer(text) if not NOT_A_RESULT.search(m.group(0)))
+        confidence = min(1.0, len(rows) / candidates) if candidates else 0.0
+        if date == "UNKNOWN":
+            confidence /= 2
+        return template['lab'], rows, round(confidence, 3)
+    return None, [], 0.0
+
+def compact_layout(pages):
+    # Layout mode pads columns with spaces; two are enough for the model
+    return [re.sub(r'[ \t]{3,}', '  ', page) for page in pages]
+
 def analyze_with_claude(text_content, file_key):
     print("🧠 Sending text to Claude 3 Haiku...")
     
@@ -76,14 +389,9 @@ def analyze_with_claude(text_content, file_key):
         ]
     })
 
+    # Bedrock errors propagate, so the upload is retried instead of saved empty
+    result_text = invoke_model(body, file_key)
     try:
-        response = bedrock.invoke_model(
-            modelId="anthropic.claude-3-haiku-20240307-v1:0",
-            body=body
-        )
-        response_body = json.loads(response.get("body").read())
-        result_text = response_body['content'][0]['text']
-        
         start = result_text.find('[')
         end = result_text.rfind(']') + 1
         if start != -1 and end != -1:
@@ -93,66 +401,423 @@ def analyze_with_claude(text_content, file_key):
             return []
             
     except Exception as e:
-        print(f"❌ Bedrock Error: {e}")
+        print(f"❌ Bad model output: {e}")
         return []
 
-def lambda_handler(event, context):
+# --- Model invocation ---
+
+_response_cache = {}
+_response_cache_lock = threading.Lock()
+
+def time_left_ms():
+    if invocation_deadline is None:
+        return float('inf')
+    return (invocation_deadline - time.time()) * 1000
+
+_short_clients = {}
+_short_clients_lock = threading.Lock()
+
+def bedrock_client(budget_s):
+    # The shared client, or one whose read timeout fits in budget_s seconds
+    if budget_s >= BEDROCK_READ_TIMEOUT:
+        return bedrock
+    timeout = next((t for t in BEDROCK_SHORT_TIMEOUTS if t <= budget_s), BEDROCK_SHORT_TIMEOUTS[-1])
+    with _short_clients_lock:
+        if timeout not in _short_clients:
+            _short_clients[timeout] = make_bedrock_client(timeout)
+        return _short_clients[timeout]
+
+def get_cached_response(prompt_hash):
+    with _response_cache_lock:
+        if prompt_hash in _response_cache:
+            return _response_cache[prompt_hash]
+    # Shared across containers through the parse cache table
+    text = get_cached_results(f"prompt#{prompt_hash}")
+    if text is not None:
+        remember_response(prompt_hash, text)
+    return text
+
+def remember_response(prompt_hash, text):
+    with _response_cache_lock:
+        _response_cache[prompt_hash] = text
+        while len(_response_cache) > RESPONSE_CACHE_SIZE:
+            del _response_cache[next(iter(_response_cache))]
+
+def invoke_model(body, file_key):
+    # Returns the model's text. Each call is a single attempt whose read timeout
+    # ends before the time margin; throttled, timed out and failed calls are
+    # retried here while the invocation has time left
+    prompt_hash = hashlib.sha256(f"{MODEL_ID}\n{body}".encode()).hexdigest()
+    cached = get_cached_response(prompt_hash)
+    if cached is not None:
+        print(f"♻️ Reusing model response for {file_key} ({prompt_hash[:12]})")
+        return cached
+
+    attempt = 0
+    while True:
+        budget_ms = time_left_ms() - BEDROCK_TIME_MARGIN_MS
+        if budget_ms <= 0:
+            raise TimeoutError(f"No time left to call Bedrock for {file_key}")
+        try:
+            response = bedrock_client(budget_ms / 1000).invoke_model(modelId=MODEL_ID, body=body)
+            break
+        except (ClientError, *BEDROCK_CONNECTION_ERRORS) as e:
+            if isinstance(e, ClientError):
+                code = e.response.get('Error', {}).get('Code')
+            else:
+                code = 'ConnectionError'
+            attempt += 1
+            delay = jitter_delay(attempt, base=1.0, cap=20.0)
+            if code not in BEDROCK_RETRY_ERRORS or time_left_ms() - delay * 1000 < BEDROCK_TIME_MARGIN_MS:
+                print(f"❌ Bedrock Error after {attempt} attempts: {e}")
+                raise
+            print(f"⏳ Bedrock {code}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    text = json.loads(response['body'].read())['content'][0]['text']
+    remember_response(prompt_hash, text)
+    put_cached_results(f"prompt#{prompt_hash}", file_key, text)
+    return text
+
+def split_into_chunks(pages, max_chars=None):
+    # Groups whole pages into chunks of at most max_chars; a longer page is
+    # split on line boundaries
+    max_chars = max_chars or MAX_CHUNK_CHARS
+    pieces = []
+    for page in pages:
+        if len(page) <= max_chars:
+            pieces.append(page)
+            continue
+        piece = ""
+        for line in page.splitlines(keepends=True):
+            if piece and len(piece) + len(line) > max_chars:
+                pieces.append(piece)
+                piece = ""
+            piece += line
+        if piece:
+            pieces.append(piece)
+
+    chunks, current, size = [], [], 0
+    for piece in pieces:
+        if current and size + len(piece) > max_chars:
+            chunks.append("".join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += len(piece)
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+def merge_results(chunk_results):
+    rows = [row for rows in chunk_results for row in rows if isinstance(row, dict) and row.get('metric')]
+
+    # The collection date is usually printed once, so rows from chunks
+    # without it take the date most often found in the others
+    dates = Counter(row['date'] for row in rows if row.get('date') and row['date'] != "UNKNOWN")
+    if dates:
+        report_date = dates.most_common(1)[0][0]
+        for row in rows:
+            if not row.get('date') or row['date'] == "UNKNOWN":
+                row['date'] = report_date
+
+    # Chunks can repeat a result (summary tables, overlapping headers)
+    merged = {}
+    for row in rows:
+        merged.setdefault((row['metric'], row.get('date')), row)
+    return list(merged.values())
+
+def analyze_document(pages, file_key):
+    chunks = split_into_chunks(pages)
+    if len(chunks) > 1:
+        print(f"✂️ Split {file_key} into {len(chunks)} chunks")
+    chunk_results = list(bedrock_pool.map(lambda chunk: analyze_with_claude(chunk, file_key), chunks))
+    return merge_results(chunk_results)
+
+# --- Bulk writes ---
+
+_serializer = TypeSerializer()
+write_stats = Counter()
+_stats_lock = threading.Lock()
+
+def count_writes(**counts):
+    with _stats_lock:
+        write_stats.update(counts)
+
+def jitter_delay(attempt, base=0.05, cap=5.0):
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def backoff(attempt, base=0.05, cap=5.0):
+    time.sleep(jitter_delay(attempt, base, cap))
+
+def is_throttle(error):
+    return error.response.get('Error', {}).get('Code') in THROTTLE_ERRORS
+
+def serialize(item):
+    return {k: _serializer.serialize(v) for k, v in item.items()}
+
+def stamp(item):
+    # A serialized row's written_at is reset before each write attempt, so that
+    # a row landing after retries is not older than what a dashboard has read past
+    if 'written_at' in item:
+        item['written_at'] = {'N': str(int(time.time()))}
+    return item
+
+def batch_write(table_name, items, key_names=('user_id', 'record_id')):
+    # 25 puts per call; unprocessed items are retried until WRITE_MAX_ATTEMPTS.
+    # A batch may not repeat a key, so the last item per key wins, as with single puts
+    unique = {tuple(item[k] for k in key_names): item for item in items}
+    requests = [{'PutRequest': {'Item': serialize(item)}} for item in unique.values()]
+    for start in range(0, len(requests), BATCH_WRITE_SIZE):
+        pending = requests[start:start + BATCH_WRITE_SIZE]
+        attempt = 0
+        while pending:
+            for request in pending:
+                stamp(request['PutRequest']['Item'])
+            try:
+                response = dynamodb.batch_write_item(RequestItems={table_name: pending})
+            except ClientError as e:
+                if not is_throttle(e) or attempt + 1 >= WRITE_MAX_ATTEMPTS:
+                    raise
+                count_writes(throttles=1)
+            else:
+                unprocessed = response.get('UnprocessedItems', {}).get(table_name, [])
+                count_writes(batches=1, written=len(pending) - len(unprocessed), unprocessed=len(unprocessed))
+                if not unprocessed:
+                    break
+                if len(unprocessed) < len(pending):
+                    # Partial progress: only consecutive failures count against the limit
+                    attempt = 0
+                pending = unprocessed
+                if attempt + 1 >= WRITE_MAX_ATTEMPTS:
+                    raise RuntimeError(f"{len(pending)} items still unprocessed after {WRITE_MAX_ATTEMPTS} attempts")
+            attempt += 1
+            backoff(attempt)
+
+def conditional_write(table_name, items):
+    # One PutItem per row: a row is only replaced when it came from different file content
+    for item in items:
+        attempt = 0
+        while True:
+            try:
+                dynamodb.put_item(
+                    TableName=table_name,
+                    Item=stamp(serialize(item)),
+                    ConditionExpression='attribute_not_exists(record_id) OR content_hash <> :hash',
+                    ExpressionAttributeValues={':hash': {'S': item['content_hash']}},
+                )
+                count_writes(written=1)
+                break
+            except ClientError as e:
+                code = e.response.get('Error', {}).get('Code')
+                if code == 'ConditionalCheckFailedException':
+                    count_writes(unchanged=1)
+                    break
+                if not is_throttle(e) or attempt + 1 >= WRITE_MAX_ATTEMPTS:
+                    raise
+                count_writes(throttles=1)
+                attempt += 1
+                backoff(attempt)
+
+def write_items(items, table_name=TABLE_NAME):
+    if CONDITIONAL_WRITES:
+        conditional_write(table_name, items)
+    else:
+        batch_write(table_name, items)
+
+def log_write_stats(elapsed):
+    with _stats_lock:
+        stats = dict(write_stats)
+        write_stats.clear()
+    stats['seconds'] = round(elapsed, 3)
+    stats['items_per_second'] = round(stats.get('written', 0) / elapsed, 1) if elapsed else 0
+    print(json.dumps({'write_stats': stats}))
+
+def get_table(name=TABLE_NAME):
+    # boto3 resources are not thread-safe, so each worker thread gets its own
+    if not hasattr(_local, 'tables'):
+        _local.resource = boto3.session.Session().resource('dynamodb')
+        _local.tables = {}
+    if name not in _local.tables:
+        _local.tables[name] = _local.resource.Table(name)
+    return _local.tables[name]
+
+def get_cached_results(content_hash):
+    if not DEDUP_TABLE:
+        return None
     try:
-        record = event['Records'][0]
-        bucket = record['s3']['bucket']['name']
-        key = urllib.parse.unquote_plus(record['s3']['object']['key'])
-        
-        if not key.endswith('.pdf'):
-            return {"statusCode": 200, "body": "Skipped non-PDF"}
-
-       
-        raw_text = extract_text_from_pdf(bucket, key)
-        if not raw_text:
-            return {"statusCode": 500, "body": "Failed to read PDF"}
-
-        
-        results = analyze_with_claude(raw_text, key)
-        
-        table = dynamodb.Table(TABLE_NAME)
-        parts = key.split('/')
-        user_id = parts[1] if len(parts) > 1 else "unknown"
-        upload_time = str(int(time.time()))
-
-        with table.batch_writer() as batch:
-            for item in results:
-                
-                date_ts = upload_time
-                if item.get('date') and item['date'] != "UNKNOWN":
-                    try:
-                        for fmt in ["%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%d-%b-%Y"]:
-                            try:
-                                dt = datetime.strptime(item['date'], fmt)
-                                date_ts = str(int(dt.timestamp()))
-                                break
-                            except:
-                                continue
-                    except:
-                        pass 
-
-                val_str = str(item['value'])
-                clean_val = re.sub(r'[^\d\.]', '', val_str) if any(c.isdigit() for c in val_str) else val_str
-
-                record_id = f"{item['metric'].replace(' ', '_')}_{key}"
-                
-                print(f"   -> Saving {item['metric']}: {clean_val}")
-                
-                batch.put_item(Item={
-                    'user_id': user_id,
-                    'record_id': record_id,
-                    'metric': item['metric'],
-                    'value': clean_val,
-                    'original_value': val_str,
-                    'unit': item.get('unit', ''),
-                    'source_file': key,
-                    'upload_timestamp': date_ts
-                })
-
-        return {"statusCode": 200, "body": "Success"}
+        item = get_table(DEDUP_TABLE).get_item(Key={'content_hash': content_hash}).get('Item')
+        return json.loads(item['results']) if item else None
     except Exception as e:
-        print(f"Error: {e}")
-        raise e
\ No newline at end of file
+        print(f"⚠️ Dedup lookup failed: {e}")
+        return None
+
+def put_cached_results(content_hash, key, results):
+    if not DEDUP_TABLE:
+        return
+    try:
+        get_table(DEDUP_TABLE).put_item(Item={
+            'content_hash': content_hash,
+            'results': json.dumps(results),
+            'source_file': key,
+            'expires_at': int(time.time()) + DEDUP_TTL_DAYS * 86400
+        })
+    except Exception as e:
+        print(f"⚠️ Dedup store failed: {e}")
+
+def process_record(record):
+    bucket = record['s3']['bucket']['name']
+    key = urllib.parse.unquote_plus(record['s3']['object']['key'])
+    
+    if not key.endswith('.pdf'):
+        return "Skipped non-PDF"
+
+    with S3RangeReader(s3, bucket, key) as fh:
+        content_hash = fh.content_id
+        # Re-uploads of the same file reuse the rows parsed the first time
+        results = get_cached_results(content_hash)
+        if results is not None:
+            print(f"♻️ Reusing parsed results for {key} ({content_hash[:12]})")
+        else:
+            try:
+                kinds = scan_pages(fh)
+            except Exception as e:
+                print(f"❌ PDF Read Error: {e}")
+                return "Failed to read PDF"
+            text_pages = [i for i, kind in enumerate(kinds) if kind == "text"]
+            if not text_pages and "image" in kinds:
+                return queue_for_ocr(bucket, key, content_hash, len(kinds))
+            # Pages that only hold a scan are not worth a content stream parse
+            pages = extract_text_from_pdf(fh, key, text_pages)
+            print(f"📥 Fetched {fh.bytes_fetched} of {fh.size} bytes of {key} in {fh.requests} requests")
+            if not pages:
+                return "Failed to read PDF"
+
+            lab, rows, confidence = parse_with_template(pages)
+            fast_path = bool(rows) and confidence >= FAST_PATH_MIN_CONFIDENCE
+            # One JSON line per document, for a CloudWatch metric filter on the hit rate
+            print(json.dumps({"fast_path": fast_path, "lab": lab, "confidence": confidence, "rows": len(rows), "key": key}))
+            if fast_path:
+                results = merge_results([rows])
+            else:
+                results = analyze_document(compact_layout(pages), key)
+            if results:
+                put_cached_results(content_hash, key, results)
+    
+    parts = key.split('/')
+    user_id = parts[1] if len(parts) > 1 else "unknown"
+
+    items = []
+    for row in normalize_rows(results):
+        print(f"   -> Saving {row.metric}: {row.value}")
+        item = row.item(user_id, record_id(row.metric, key), key)
+        item['content_hash'] = content_hash
+        items.append(item)
+
+    write_items(items)
+    return "Success"
+
+def run_concurrently(jobs):
+    # jobs: list of (job_id, s3_record). Returns {job_id: status or exception}
+    outcomes = {}
+    futures = {record_pool.submit(process_record, record): job_id for job_id, record in jobs}
+    for future in as_completed(futures):
+        job_id = futures[future]
+        try:
+            outcomes[job_id] = future.result()
+        except Exception as e:
+            print(f"❌ Record {job_id} failed: {e}")
+            outcomes[job_id] = e
+    return outcomes
+
+def handle_sqs_batch(records):
+    # Each SQS message carries an S3 event notification with one or more records
+    jobs = []
+    failed = set()
+    for message in records:
+        try:
+            body = json.loads(message['body'])
+        except Exception as e:
+            print(f"❌ Bad message {message['messageId']}: {e}")
+            failed.add(message['messageId'])
+            continue
+        if body.get('Event') == 's3:TestEvent':
+            continue
+        for i, record in enumerate(body.get('Records', [])):
+            jobs.append(((message['messageId'], i), record))
+
+    print(f"📦 Processing {len(jobs)} uploads from {len(records)} messages")
+    for (message_id, _), outcome in run_concurrently(jobs).items():
+        if isinstance(outcome, Exception) or outcome == "Failed to read PDF":
+            failed.add(message_id)
+
+    # Only the failed messages are retried (and end up in the dead-letter queue)
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in sorted(failed)]}
+
+_deserializer = TypeDeserializer()
+
+def stream_row(image):
+    # (user_id, record_id, Row) of a stream image, or None for non-result items
+    if not image:
+        return None
+    item = {k: _deserializer.deserialize(v) for k, v in image.items()}
+    row = to_row(item)
+    return (item['user_id'], item['record_id'], row) if row else None
+
+def handle_stream_batch(records):
+    # Stats table stream: inserted rows are folded into their metric's summary;
+    # a modified or removed row has its metric rebuilt from the table
+    if not SUMMARY_TABLE:
+        return {"batchItemFailures": []}
+    changes = defaultdict(dict)  # user_id -> {metric: [(Row, record_id)] or None}
+    for record in records:
+        old = stream_row(record['dynamodb'].get('OldImage'))
+        new = stream_row(record['dynamodb'].get('NewImage'))
+        if old == new or (old and new and old[:2] == new[:2] and same_point(old[2], new[2])):
+            continue  # same row rewritten, e.g. a re-uploaded file or '750' saved as '750.0'
+        if old is None:
+            user_id, rid, row = new
+            points = changes[user_id].setdefault(row.metric, [])
+            if points is not None:
+                points.append((row, rid))
+            continue
+        for user_id, _, row in filter(None, (old, new)):
+            changes[user_id][row.metric] = None
+    # Errors propagate: the batch is retried in order, so no change is skipped
+    for user_id, metric_changes in changes.items():
+        apply_changes(get_table(SUMMARY_TABLE), get_table(), user_id, metric_changes)
+    print(f"📊 Updated {sum(map(len, changes.values()))} summaries from {len(records)} stream records")
+    return {"batchItemFailures": []}
+
+def lambda_handler(event, context):
+    global invocation_deadline
+    started = time.time()
+    if context is not None:
+        invocation_deadline = started + context.get_remaining_time_in_millis() / 1000
+    try:
+        return handle_event(event)
+    finally:
+        # Per-invocation write throughput and throttling, for CloudWatch
+        log_write_stats(time.time() - started)
+
+def handle_event(event):
+    records = event.get('Records', [])
+    if records and records[0].get('eventSource') == 'aws:sqs':
+        return handle_sqs_batch(records)
+    if records and records[0].get('eventSource') == 'aws:dynamodb':
+        return handle_stream_batch(records)
+
+    # Direct S3 notification: every record is processed, not just the first
+    outcomes = run_concurrently(list(enumerate(records)))
+    errors = [o for o in outcomes.values() if isinstance(o, Exception)]
+    if errors:
+        print(f"Error: {errors[0]}")
+        raise errors[0]
+    statuses = [outcomes[i] for i in range(len(records))]
+    if "Failed to read PDF" in statuses:
+        return {"statusCode": 500, "body": "Failed to read PDF"}
+    if statuses and all(s == "Skipped non-PDF" for s in statuses):
+        return {"statusCode": 200, "body": "Skipped non-PDF"}
+    if statuses and all(s in ("Queued for OCR", "Skipped image-only PDF") for s in statuses):
+        return {"statusCode": 200, "body": statuses[0]}
+    return {"statusCode": 200, "body": "Success"}
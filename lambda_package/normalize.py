@@ -0,0 +1,109 @@
+"""
+Normalization of lab result rows before they are stored.
+
+Used by the ingestor for parsed reports and by the dashboard for manual
+edits, so both write values, timestamps and record ids the same way.
+The repo root's normalize.py is a symlink to this file, so there is only
+one copy to change.
+"""
+
+import re
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+# Report dates in the formats the parser emits, tried as one pattern
+DATE_PATTERN = re.compile(
+    r'(?P<iso>\d{4}-\d{1,2}-\d{1,2})'
+    r'|(?P<us>\d{1,2}/\d{1,2}/\d{4})'
+    r'|(?P<us_short>\d{1,2}/\d{1,2}/\d{2})'
+    r'|(?P<day_month>\d{1,2}-[A-Za-z]{3}-\d{4})'
+)
+DATE_FORMATS = {
+    'iso': "%Y-%m-%d",
+    'us': "%m/%d/%Y",
+    'us_short': "%m/%d/%y",
+    'day_month': "%d-%b-%Y",
+}
+NON_NUMERIC = re.compile(r'[^\d.]')
+
+
+class Row(NamedTuple):
+    metric: str
+    value: str
+    original_value: str
+    unit: str
+    timestamp: int
+
+    def item(self, user_id, record_id, source_file):
+        return {
+            'user_id': user_id,
+            'record_id': record_id,
+            'metric': self.metric,
+            'value': self.value,
+            'original_value': self.original_value,
+            'unit': self.unit,
+            'source_file': source_file,
+            'upload_timestamp': str(self.timestamp),
+            # Write time, for incremental loads; upload_timestamp is the result date
+            'written_at': int(time.time()),
+        }
+
+
+@lru_cache(maxsize=1024)
+def parse_date(text) -> Optional[int]:
+    # Unix timestamp of a report date, or None if it is not recognized
+    match = DATE_PATTERN.fullmatch(text.strip())
+    if match is None:
+        return None
+    try:
+        return int(datetime.strptime(match.group(), DATE_FORMATS[match.lastgroup]).timestamp())
+    except ValueError:
+        return None
+
+
+def to_timestamp(date, default):
+    if date is None or date != date:  # None, NaN or NaT
+        return default
+    if isinstance(date, str):
+        if date == "UNKNOWN":
+            return default
+        ts = parse_date(date)
+        return default if ts is None else ts
+    if isinstance(date, (int, float)):
+        return int(date)
+    # datetime, or pandas Timestamp, which treats naive values as UTC
+    return int(date.timestamp())
+
+
+def clean_value(value):
+    # Keeps the digits and decimal point of values such as "<0.5" or "1,200";
+    # values without digits ("Negative") are stored as written
+    text = str(value)
+    cleaned = NON_NUMERIC.sub('', text)
+    return cleaned if any(c.isdigit() for c in cleaned) else text
+
+
+def record_id(metric, suffix):
+    return f"{str(metric).replace(' ', '_')}_{suffix}"
+
+
+def normalize_rows(rows, default_timestamp=None):
+    """
+    Normalize dicts with metric, value, unit and date (a report date string,
+    datetime, or Unix timestamp) into Rows. Rows without a usable date get
+    default_timestamp, the current time if not given.
+    """
+    if default_timestamp is None:
+        default_timestamp = int(time.time())
+    return [
+        Row(
+            metric=str(row['metric']),
+            value=clean_value(row['value']),
+            original_value=str(row['value']),
+            unit=row['unit'] if isinstance(row.get('unit'), str) else '',
+            timestamp=to_timestamp(row.get('date'), default_timestamp),
+        )
+        for row in rows
+    ]
@@ -4,7 +4,7 @@ from binascii import unhexlify
 from math import ceil
 from typing import Any, Union, cast
 
-from ._codecs import adobe_glyphs, charset_encoding
+from ._codecs import charset_encoding
 from ._utils import logger_error, logger_warning
 from .generic import (
     DecodedStreamObject,
@@ -97,6 +97,8 @@ def _parse_encoding(
     else:
         encoding = charset_encoding["/StandardEncoding"].copy()
     if isinstance(enc, DictionaryObject) and "/Differences" in enc:
+        from ._codecs.adobe_glyphs import adobe_glyphs  # noqa: PLC0415
+
         x: int = 0
         o: Union[int, str]
         for o in cast(DictionaryObject, enc["/Differences"]):
@@ -313,6 +315,8 @@ def _type1_alternative(
     txt = ft_desc.get_object().get_data()
     txt = txt.split(b"eexec\n")[0]  # only clear part
     txt = txt.split(b"/Encoding")[1]  # to get the encoding part
+    from ._codecs.adobe_glyphs import adobe_glyphs  # noqa: PLC0415
+
     lines = txt.replace(b"\r", b"\n").split(b"\n")
     for li in lines:
         if li.startswith(b"dup"):
@@ -1,4 +1,5 @@
-from .adobe_glyphs import adobe_glyphs
+from typing import Any
+
 from .pdfdoc import _pdfdoc_encoding
 from .std import _std_encoding
 from .symbol import _symbol_encoding
@@ -46,6 +47,17 @@ charset_encoding: dict[str, list[str]] = {
     "/ZapfDingbats": _zapfding_encoding,
 }
 
+def __getattr__(name: str) -> Any:
+    # The glyph list is large and only needed for fonts with named glyphs,
+    # so it is imported on first access instead of with the package.
+    if name == "adobe_glyphs":
+        from .adobe_glyphs import adobe_glyphs  # noqa: PLC0415
+
+        globals()[name] = adobe_glyphs
+        return adobe_glyphs
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "_mac_encoding",
     "_pdfdoc_encoding",
@@ -5,7 +5,6 @@ from typing import Any, Optional, Union, cast
 from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject
 
 from ._cmap import get_encoding
-from ._codecs.adobe_glyphs import adobe_glyphs
 from ._utils import logger_warning
 
 
@@ -293,6 +292,8 @@ class Font:
         # PDF 1.7 standard.
         interpretable = True
         if sub_type == "Type3" and "/ToUnicode" not in pdf_font_dict:
+            from ._codecs.adobe_glyphs import adobe_glyphs  # noqa: PLC0415
+
             interpretable = all(
                 cname in adobe_glyphs
                 for cname in pdf_font_dict.get("/CharProcs") or []
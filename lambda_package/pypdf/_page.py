@@ -30,7 +30,7 @@
 import math
 from collections.abc import Iterable, Iterator, Sequence
 from copy import deepcopy
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, replace
 from decimal import Decimal
 from io import BytesIO
 from pathlib import Path
@@ -1668,6 +1668,13 @@ class PageObject(DictionaryObject):
             out += "No Font\n"
         return out
 
+    def _get_font(self, font_dict: DictionaryObject) -> Font:
+        """Parse a font, through the reader's font cache when there is one."""
+        get_font = getattr(self.pdf, "_get_font", None)
+        if get_font is None:
+            return Font.from_font_resource(font_dict)
+        return get_font(font_dict)
+
     def _extract_text(
         self,
         obj: Any,
@@ -1714,10 +1721,11 @@ class PageObject(DictionaryObject):
                 try:
                     font_resource_object = cast(DictionaryObject, font_resources_dict[font_resource].get_object())
                     font_resources[font_resource] = font_resource_object
-                    fonts[font_resource] = Font.from_font_resource(font_resource_object)
+                    fonts[font_resource] = self._get_font(font_resource_object)
                     # Override space width, if applicable
                     if fonts[font_resource].character_widths.get(" ", 0) == 0:
-                        fonts[font_resource].space_width = space_width
+                        # Copy first, the font may be shared with other pages
+                        fonts[font_resource] = replace(fonts[font_resource], space_width=space_width)
                 except (AttributeError, TypeError):
                     pass
 
@@ -1736,7 +1744,7 @@ class PageObject(DictionaryObject):
         # Initialize the extractor with the necessary parameters
         extractor.initialize_extraction(orientations, visitor_text, font_resources, fonts)
 
-        for operands, operator in content.operations:
+        for operands, operator in content.iter_operations():
             if visitor_operand_before is not None:
                 visitor_operand_before(operator, operands, extractor.cm_matrix, extractor.tm_matrix)
             # Multiple operators are handled here
@@ -1849,7 +1857,7 @@ class PageObject(DictionaryObject):
                 resources_dict = {}
             if "/Font" in resources_dict and self.pdf is not None:
                 for font_name in resources_dict["/Font"]:
-                    fonts[font_name] = Font.from_font_resource(resources_dict["/Font"][font_name])
+                    fonts[font_name] = self._get_font(resources_dict["/Font"][font_name].get_object())
             try:
                 objr = objr["/Parent"].get_object()
             except KeyError:
@@ -1900,9 +1908,7 @@ class PageObject(DictionaryObject):
                 "utf-8"
             )
 
-        ops = iter(
-            ContentStream(self["/Contents"].get_object(), self.pdf, "bytes").operations
-        )
+        ops = ContentStream(self["/Contents"].get_object(), self.pdf, "bytes").iter_operations()
         bt_groups = _layout_mode.text_show_operations(
             ops, fonts, strip_rotated, debug_path
         )
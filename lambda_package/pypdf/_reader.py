@@ -27,10 +27,11 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
+import mmap
 import os
-import re
 import sys
-from collections.abc import Iterable
+import threading
+from collections.abc import Iterable, Iterator, Sequence
 from io import BytesIO, UnsupportedOperation
 from pathlib import Path
 from types import TracebackType
@@ -45,8 +46,10 @@ from typing import (
 
 from ._doc_common import PdfDocCommon, convert_to_int
 from ._encryption import Encryption, PasswordType
+from ._font import Font
 from ._utils import (
     WHITESPACES_AS_BYTES,
+    MappedFile,
     StrByteType,
     StreamType,
     logger_warning,
@@ -55,7 +58,9 @@ from ._utils import (
     read_until_whitespace,
     skip_over_comment,
     skip_over_whitespace,
+    stream_buffer,
 )
+from .constants import PageAttributes as PG
 from .constants import TrailerKeys as TK
 from .errors import (
     EmptyFileError,
@@ -97,7 +102,8 @@ class PdfReader(PdfDocCommon):
     Args:
         stream: A File object or an object that supports the standard read
             and seek methods similar to a File object. Could also be a
-            string representing a path to a PDF file.
+            string representing a path to a PDF file, or a file descriptor
+            when *memory_map* is set.
         strict: Determines whether user should be warned of all
             problems and also causes some correctable problems to be fatal.
             Defaults to ``False``.
@@ -107,16 +113,39 @@ class PdfReader(PdfDocCommon):
         root_object_recovery_limit: The maximum number of objects to query
             for recovering the Root object in non-strict mode. To disable
             this security measure, pass ``None``.
+        object_stream_cache_size: The maximum number of decoded object
+            streams (/ObjStm) to keep in memory. Each object stream is
+            decompressed and indexed only once while it stays in the cache.
+            Pass ``None`` for no limit, or ``0`` to disable the cache.
+        memory_map: Map the file into memory instead of reading it. Applies
+            when *stream* is a path, a file descriptor or a file object
+            with a ``fileno()``, and is ignored for other streams. Objects
+            are read from the mapping and repairs search it directly, so the
+            file is never copied in full. Defaults to ``False``.
+        font_cache_size: The maximum number of fonts to keep parsed for
+            text extraction. Fonts are shared between pages, so their
+            encoding, /ToUnicode CMap and widths are computed once per
+            indirect font object instead of once per page. Pass ``None``
+            for no limit, or ``0`` to disable the cache.
+        lazy_stream_threshold: Read the data of streams at least this many
+            bytes long only when it is first accessed. Parsing a page then
+            skips over image data it does not decode, which saves I/O for
+            streams backed by slow or remote storage. The stream must stay
+            open while objects are in use. Defaults to ``None`` (disabled).
 
     """
 
     def __init__(
         self,
-        stream: Union[StrByteType, Path],
+        stream: Union[StrByteType, Path, int],
         strict: bool = False,
         password: Union[None, str, bytes] = None,
         *,
         root_object_recovery_limit: Optional[int] = 10_000,
+        object_stream_cache_size: Optional[int] = None,
+        memory_map: bool = False,
+        font_cache_size: Optional[int] = 256,
+        lazy_stream_threshold: Optional[int] = None,
     ) -> None:
         self.strict = strict
         self.flattened_pages: Optional[list[PageObject]] = None
@@ -131,6 +160,20 @@ class PdfReader(PdfDocCommon):
         self.xref_objStm: dict[int, tuple[Any, Any]] = {}
         self.trailer = DictionaryObject()
 
+        # Decoded object streams: stream number -> (data, objnum -> (index, offset))
+        self._object_streams: dict[int, tuple[BytesIO, dict[int, tuple[int, int]]]] = {}
+        self._object_stream_cache_size = object_stream_cache_size
+
+        # Object header offsets found by scanning the file, see _get_object_locations
+        self._object_locations: Optional[dict[int, dict[int, int]]] = None
+
+        # Parsed fonts for text extraction: (idnum, generation) -> Font
+        self._fonts: dict[tuple[int, int], Font] = {}
+        self._font_cache_size = font_cache_size
+        self._lazy_stream_threshold = lazy_stream_threshold
+        self._font_cache_hits = 0
+        self._font_cache_misses = 0
+
         # Security parameters.
         self._root_object_recovery_limit = (
             root_object_recovery_limit if isinstance(root_object_recovery_limit, int) else sys.maxsize
@@ -141,7 +184,7 @@ class PdfReader(PdfDocCommon):
 
         self._validated_root: Optional[DictionaryObject] = None
 
-        self._initialize_stream(stream)
+        self._initialize_stream(stream, memory_map)
         self._known_objects: set[tuple[int, int]] = set()
 
         self._override_encryption = False
@@ -151,7 +194,9 @@ class PdfReader(PdfDocCommon):
         elif password is not None:
             raise PdfReadError("Not an encrypted file")
 
-    def _initialize_stream(self, stream: Union[StrByteType, Path]) -> None:
+    def _initialize_stream(
+        self, stream: Union[StrByteType, Path, int], memory_map: bool = False
+    ) -> None:
         if hasattr(stream, "mode") and "b" not in stream.mode:
             logger_warning(
                 "PdfReader stream/file object is not in binary mode. "
@@ -159,13 +204,60 @@ class PdfReader(PdfDocCommon):
                 __name__,
             )
         self._stream_opened = False
-        if isinstance(stream, (str, Path)):
+        mapped = self._map_stream(stream) if memory_map else None
+        if mapped is not None:
+            stream = mapped
+            self._stream_opened = True
+        elif isinstance(stream, (str, Path)):
             with open(stream, "rb") as fh:
                 stream = BytesIO(fh.read())
             self._stream_opened = True
-        self.read(stream)
+        try:
+            self.read(stream)
+        except Exception:
+            if mapped is not None:
+                mapped.close()
+            raise
         self.stream = stream
 
+    @staticmethod
+    def _map_stream(stream: Union[StrByteType, Path, int]) -> Optional[MappedFile]:
+        """
+        Map a path, file descriptor or file object read-only into memory.
+
+        Returns ``None`` for streams without a file descriptor, such as
+        BytesIO, which are then read as usual.
+        """
+        if isinstance(stream, (str, Path)):
+            with open(stream, "rb") as fh:
+                return PdfReader._map_stream(fh.fileno())
+        if isinstance(stream, int):
+            fileno = stream
+        else:
+            try:
+                fileno = stream.fileno()
+            except (AttributeError, OSError):  # io.UnsupportedOperation is an OSError
+                return None
+        if os.fstat(fileno).st_size == 0:
+            # mmap refuses empty files
+            raise EmptyFileError("Cannot read an empty file")
+        # The mapping keeps its own duplicate of the descriptor.
+        return MappedFile(fileno, 0, access=mmap.ACCESS_READ)
+
+    def _get_stream_data(self, stream: StreamType) -> Union[bytes, mmap.mmap]:
+        """
+        Return the whole content of the stream, for searches.
+
+        In-memory and memory-mapped data is returned without being copied.
+        """
+        buf = stream_buffer(stream)
+        if buf is None:
+            p = stream.tell()
+            stream.seek(0, 0)
+            buf = stream.read(-1)
+            stream.seek(p, 0)
+        return buf
+
     def _handle_encryption(self, password: Optional[Union[str, bytes]]) -> None:
         self._override_encryption = True
         # Some documents may not have a /ID, use two empty
@@ -207,6 +299,72 @@ class PdfReader(PdfDocCommon):
         self.xref = {}
         self.xref_free_entry = {}
         self.xref_objStm = {}
+        self._object_locations = None
+        self.clear_object_stream_cache()
+        self.clear_font_cache()
+
+    def clear_object_stream_cache(self) -> None:
+        """
+        Drop all decoded object streams.
+
+        Objects already read stay available; object streams needed later
+        are decoded again on demand.
+        """
+        self._object_streams = {}
+
+    def clear_font_cache(self) -> None:
+        """Drop all parsed fonts and reset the font cache statistics."""
+        self._fonts = {}
+        self._font_cache_hits = 0
+        self._font_cache_misses = 0
+
+    def font_cache_info(self) -> dict[str, Optional[int]]:
+        """
+        Statistics of the font cache used by text extraction.
+
+        Returns:
+            A dictionary with the number of ``hits`` and ``misses``, the
+            current ``size`` and the ``maxsize`` of the cache.
+
+        """
+        return {
+            "hits": self._font_cache_hits,
+            "misses": self._font_cache_misses,
+            "size": len(self._fonts),
+            "maxsize": self._font_cache_size,
+        }
+
+    def _get_font(self, font_dict: DictionaryObject) -> Font:
+        """
+        Return the parsed font for a font dictionary.
+
+        Fonts that are indirect objects of this reader are cached, keyed by
+        their indirect reference. The returned font is shared: callers must
+        copy it before modifying it.
+
+        Args:
+            font_dict: The font dictionary, as found in a /Font resource.
+
+        Returns:
+            The parsed font.
+
+        """
+        ref = font_dict.indirect_reference
+        if ref is None or ref.pdf is not self or self._font_cache_size == 0:
+            return Font.from_font_resource(font_dict)
+        key = (ref.idnum, ref.generation)
+        font = self._fonts.pop(key, None)
+        if font is None:
+            self._font_cache_misses += 1
+            font = Font.from_font_resource(font_dict)
+        else:
+            self._font_cache_hits += 1
+        # Re-insert to mark as most recently used; evict the oldest ones.
+        self._fonts[key] = font
+        if self._font_cache_size is not None:
+            while len(self._fonts) > self._font_cache_size:
+                del self._fonts[next(iter(self._fonts))]
+        return font
 
     @property
     def root_object(self) -> DictionaryObject:
@@ -340,31 +498,69 @@ class PdfReader(PdfDocCommon):
         assert self._page_id2num is not None, "hint for mypy"
         return self._page_id2num.get(idnum, None)
 
+    def _get_object_stream(
+        self, stmnum: int
+    ) -> tuple[BytesIO, dict[int, tuple[int, int]]]:
+        """
+        Decode an object stream and index the objects it contains.
+
+        The result is cached, so the stream is decompressed and its header
+        parsed once instead of once per contained object.
+
+        Args:
+            stmnum: The object number of the object stream.
+
+        Returns:
+            The decoded stream data and a mapping of object numbers to their
+            index in the stream header and absolute offset in the data.
+
+        """
+        cached = self._object_streams.pop(stmnum, None)
+        if cached is None:
+            obj_stm: EncodedStreamObject = IndirectObject(stmnum, 0, self).get_object()  # type: ignore
+            # This is an xref to a stream, so its type better be a stream
+            assert cast(str, obj_stm["/Type"]) == "/ObjStm"
+            stream_data = BytesIO(obj_stm.get_data())
+            first = cast(int, obj_stm["/First"])
+            offsets: dict[int, tuple[int, int]] = {}
+            for i in range(obj_stm["/N"]):  # type: ignore
+                try:
+                    read_non_whitespace(stream_data)
+                    stream_data.seek(-1, 1)
+                    objnum = NumberObject.read_from_stream(stream_data)
+                    read_non_whitespace(stream_data)
+                    stream_data.seek(-1, 1)
+                    offset = NumberObject.read_from_stream(stream_data)
+                except (PdfReadError, ValueError) as exc:
+                    if self.strict:
+                        raise PdfReadError(f"Cannot read object stream {stmnum} header: {exc}")
+                    logger_warning(
+                        f"Object stream {stmnum} header truncated after {i} entries",
+                        __name__,
+                    )
+                    break
+                # Keep the first occurrence, as the previous linear scan did.
+                offsets.setdefault(int(objnum), (i, int(first + offset)))
+            cached = (stream_data, offsets)
+        if self._object_stream_cache_size is None or self._object_stream_cache_size > 0:
+            # Re-insert to mark as most recently used; evict the oldest ones.
+            self._object_streams[stmnum] = cached
+            if self._object_stream_cache_size is not None:
+                while len(self._object_streams) > self._object_stream_cache_size:
+                    del self._object_streams[next(iter(self._object_streams))]
+        return cached
+
     def _get_object_from_stream(
         self, indirect_reference: IndirectObject
     ) -> Union[int, PdfObject, str]:
         # indirect reference to object in object stream
-        # read the entire object stream into memory
         stmnum, idx = self.xref_objStm[indirect_reference.idnum]
-        obj_stm: EncodedStreamObject = IndirectObject(stmnum, 0, self).get_object()  # type: ignore
-        # This is an xref to a stream, so its type better be a stream
-        assert cast(str, obj_stm["/Type"]) == "/ObjStm"
-        stream_data = BytesIO(obj_stm.get_data())
-        for i in range(obj_stm["/N"]):  # type: ignore
-            read_non_whitespace(stream_data)
-            stream_data.seek(-1, 1)
-            objnum = NumberObject.read_from_stream(stream_data)
-            read_non_whitespace(stream_data)
-            stream_data.seek(-1, 1)
-            offset = NumberObject.read_from_stream(stream_data)
-            read_non_whitespace(stream_data)
-            stream_data.seek(-1, 1)
-            if objnum != indirect_reference.idnum:
-                # We're only interested in one object
-                continue
+        stream_data, offsets = self._get_object_stream(stmnum)
+        if indirect_reference.idnum in offsets:
+            i, offset = offsets[indirect_reference.idnum]
             if self.strict and idx != i:
                 raise PdfReadError("Object is in wrong index.")
-            stream_data.seek(int(obj_stm["/First"] + offset), 0)  # type: ignore
+            stream_data.seek(offset, 0)
 
             # To cope with case where the 'pointer' is on a white space
             read_non_whitespace(stream_data)
@@ -429,26 +625,18 @@ class PdfReader(PdfDocCommon):
                 ):
                     raise PdfReadError("Not matching, we parse the file for it")
             except Exception:
-                if hasattr(self.stream, "getbuffer"):
-                    buf = bytes(self.stream.getbuffer())
-                else:
-                    p = self.stream.tell()
-                    self.stream.seek(0, 0)
-                    buf = self.stream.read(-1)
-                    self.stream.seek(p, 0)
-                m = re.search(
-                    rf"\s{indirect_reference.idnum}\s+{indirect_reference.generation}\s+obj".encode(),
-                    buf,
-                )
-                if m is not None:
+                located = self._get_object_locations(self.stream).get(
+                    indirect_reference.generation, {}
+                ).get(indirect_reference.idnum)
+                if located is not None:
                     logger_warning(
                         f"Object ID {indirect_reference.idnum},{indirect_reference.generation} ref repaired",
                         __name__,
                     )
                     self.xref[indirect_reference.generation][
                         indirect_reference.idnum
-                    ] = (m.start(0) + 1)
-                    self.stream.seek(m.start(0) + 1)
+                    ] = located
+                    self.stream.seek(located)
                     idnum, generation = self.read_object_header(self.stream)
                 else:
                     idnum = -1
@@ -489,30 +677,19 @@ class PdfReader(PdfDocCommon):
                     retval, indirect_reference.idnum, indirect_reference.generation
                 )
         else:
-            if hasattr(self.stream, "getbuffer"):
-                buf = bytes(self.stream.getbuffer())
-            else:
-                p = self.stream.tell()
-                self.stream.seek(0, 0)
-                buf = self.stream.read(-1)
-                self.stream.seek(p, 0)
-            m = re.search(
-                rf"\s{indirect_reference.idnum}\s+{indirect_reference.generation}\s+obj".encode(),
-                buf,
-            )
-            if m is not None:
+            located = self._get_object_locations(self.stream).get(
+                indirect_reference.generation, {}
+            ).get(indirect_reference.idnum)
+            if located is not None:
                 logger_warning(
                     f"Object {indirect_reference.idnum} {indirect_reference.generation} found",
                     __name__,
                 )
                 if indirect_reference.generation not in self.xref:
                     self.xref[indirect_reference.generation] = {}
-                self.xref[indirect_reference.generation][indirect_reference.idnum] = (
-                    m.start(0) + 1
-                )
-                self.stream.seek(m.end(0) + 1)
-                skip_over_whitespace(self.stream)
-                self.stream.seek(-1, 1)
+                self.xref[indirect_reference.generation][indirect_reference.idnum] = located
+                self.stream.seek(located)
+                self.read_object_header(self.stream)
                 retval = read_object(self.stream, self)  # type: ignore
 
                 # override encryption is used for the /Encrypt dictionary
@@ -802,15 +979,14 @@ class PdfReader(PdfDocCommon):
 
                     offset, generation = int(offset_b), int(generation_b)
                 except Exception:
-                    if hasattr(stream, "getbuffer"):
-                        buf = bytes(stream.getbuffer())
-                    else:
-                        p = stream.tell()
-                        stream.seek(0, 0)
-                        buf = stream.read(-1)
-                        stream.seek(p)
-
-                    f = re.search(rf"{num}\s+(\d+)\s+obj".encode(), buf)
+                    f = next(
+                        (
+                            (gen, objects[num])
+                            for gen, objects in self._get_object_locations(stream).items()
+                            if num in objects
+                        ),
+                        None,
+                    )
                     if f is None:
                         logger_warning(
                             f"entry {num} in Xref table invalid; object not found",
@@ -824,8 +1000,7 @@ class PdfReader(PdfDocCommon):
                             f"entry {num} in Xref table invalid but object found",
                             __name__,
                         )
-                        generation = int(f.group(1))
-                        offset = f.start()
+                        generation, offset = f
 
                 if generation not in self.xref:
                     self.xref[generation] = {}
@@ -1120,15 +1295,37 @@ class PdfReader(PdfDocCommon):
 
             index += 7  # len(b"trailer")
 
-    def _rebuild_xref_table(self, stream: StreamType) -> None:
-        self.xref = {}
-        stream.seek(0, 0)
-        stream_data = stream.read(-1)
+    def _get_object_locations(self, stream: StreamType) -> dict[int, dict[int, int]]:
+        """
+        Locate all object headers ("<idnum> <generation> obj") in the file.
+
+        The file is scanned once, the first time a repair needs it. Later
+        repairs and :meth:`_rebuild_xref_table` reuse the result instead of
+        searching the whole file again for each object.
 
-        for object_number, generation_number, object_start in self._find_pdf_objects(stream_data):
-            if generation_number not in self.xref:
-                self.xref[generation_number] = {}
-            self.xref[generation_number][object_number] = object_start
+        Args:
+            stream: The PDF file stream.
+
+        Returns:
+            The object offsets by generation, then object number, like
+            ``xref``. For objects defined several times, the last one wins.
+
+        """
+        if self._object_locations is None:
+            locations: dict[int, dict[int, int]] = {}
+            for object_number, generation_number, object_start in self._find_pdf_objects(
+                self._get_stream_data(stream)
+            ):
+                locations.setdefault(generation_number, {})[object_number] = object_start
+            self._object_locations = locations
+        return self._object_locations
+
+    def _rebuild_xref_table(self, stream: StreamType) -> None:
+        stream_data = self._get_stream_data(stream)
+        self.xref = {
+            generation_number: dict(objects)
+            for generation_number, objects in self._get_object_locations(stream).items()
+        }
 
         logger_warning("parsing for Object Streams", __name__)
         for generation_number in self.xref:
@@ -1249,6 +1446,167 @@ class PdfReader(PdfDocCommon):
         """
         return TK.ENCRYPT in self.trailer
 
+    def extract_text_pages(
+        self,
+        page_numbers: Optional[Sequence[int]] = None,
+        *,
+        max_workers: Optional[int] = None,
+        use_threads: bool = False,
+        min_pages: int = 8,
+        **kwargs: Any,
+    ) -> list[str]:
+        """
+        Extract the text of several pages concurrently.
+
+        Each worker opens its own reader on the document data, so pages are
+        parsed in parallel without sharing a stream. Processes are used by
+        default, as text extraction is CPU-bound; threads fit documents
+        whose reading is I/O-bound, e.g. remote streams or heavy repairs.
+        If processes cannot be started (for example on AWS Lambda, which
+        has no shared memory for process pools), the pages are extracted
+        serially.
+
+        Args:
+            page_numbers: Zero-based numbers of the pages to extract.
+                Defaults to all pages.
+            max_workers: The number of worker processes or threads.
+                Defaults to the number of CPUs.
+            use_threads: Use a thread pool instead of processes.
+            min_pages: Documents with fewer pages to extract are processed
+                serially, as starting workers would cost more than it saves.
+            **kwargs: Passed to :meth:`PageObject.extract_text()<pypdf._page.PageObject.extract_text>`.
+                With processes, they must be picklable and visitor
+                functions run in the worker processes.
+
+        Returns:
+            The text of each page, in the order of *page_numbers*.
+
+        """
+        if page_numbers is None:
+            page_numbers = range(len(self.pages))
+        workers = min(max_workers or os.cpu_count() or 1, len(page_numbers))
+        if workers <= 1 or len(page_numbers) < min_pages:
+            return [self.pages[i].extract_text(**kwargs) for i in page_numbers]
+
+        data = self._get_stream_data(self.stream)
+        encryption_key = None
+        if self._encryption is not None and self._encryption.is_decrypted():
+            encryption_key = (self._encryption._key, self._encryption._password_type)
+
+        if use_threads:
+            from concurrent.futures import ThreadPoolExecutor  # noqa: PLC0415
+
+            local = threading.local()
+
+            def extract(page_number: int) -> str:
+                reader = getattr(local, "reader", None)
+                if reader is None:
+                    reader = local.reader = _open_worker_reader(data, self.strict, encryption_key)
+                return reader.pages[page_number].extract_text(**kwargs)
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(extract, page_numbers))
+
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        # Pages are dealt round-robin, so that every worker gets a similar
+        # mix of light and heavy pages. Pipes are used instead of a process
+        # pool, which needs shared memory semaphores.
+        import multiprocessing  # noqa: PLC0415
+
+        chunks = [list(page_numbers[i::workers]) for i in range(workers)]
+        processes: list[tuple[Any, Any, list[int]]] = []
+        try:
+            for chunk in chunks:
+                parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(
+                    target=_extract_text_worker,
+                    args=(child_conn, data, self.strict, encryption_key, chunk, kwargs),
+                    daemon=True,
+                )
+                process.start()
+                child_conn.close()
+                processes.append((process, parent_conn, chunk))
+        except OSError as exc:
+            logger_warning(f"Cannot start worker processes ({exc}), extracting text serially.", __name__)
+            for process, parent_conn, _ in processes:
+                parent_conn.close()
+                process.join()
+            return [self.pages[i].extract_text(**kwargs) for i in page_numbers]
+
+        texts: dict[int, str] = {}
+        error: Optional[BaseException] = None
+        for process, parent_conn, chunk in processes:
+            try:
+                result = parent_conn.recv()
+            except EOFError:
+                logger_warning(
+                    f"Text extraction worker exited with code {process.exitcode}, "
+                    "extracting its pages serially.",
+                    __name__,
+                )
+                result = [self.pages[i].extract_text(**kwargs) for i in chunk]
+            finally:
+                parent_conn.close()
+                process.join()
+            if isinstance(result, BaseException):
+                error = error or result
+            else:
+                texts.update(zip(chunk, result))
+        if error is not None:
+            raise error
+        return [texts[i] for i in page_numbers]
+
+    def iter_text_pages(
+        self,
+        page_numbers: Optional[Sequence[int]] = None,
+        *,
+        release_contents: bool = True,
+        **kwargs: Any,
+    ) -> Iterator[str]:
+        """
+        Extract the text of pages one at a time.
+
+        The text of each page is yielded as soon as it is extracted, so the
+        caller can process it and stop early. Unless *release_contents* is
+        ``False``, the content streams of the page are then dropped from
+        :attr:`resolved_objects`, so the memory used by the decoded streams
+        is bounded by the largest page instead of growing with the
+        document. They are read again if the page is used later.
+
+        Args:
+            page_numbers: Zero-based numbers of the pages to extract.
+                Defaults to all pages.
+            release_contents: Drop the content streams of each page from the
+                object cache once its text is extracted.
+            **kwargs: Passed to :meth:`PageObject.extract_text()<pypdf._page.PageObject.extract_text>`.
+
+        Returns:
+            An iterator over the text of each page, in the order of
+            *page_numbers*.
+
+        """
+        if page_numbers is None:
+            page_numbers = range(len(self.pages))
+        for page_number in page_numbers:
+            page = self.pages[page_number]
+            text = page.extract_text(**kwargs)
+            if release_contents:
+                self._release_page_contents(page)
+            yield text
+
+    def _release_page_contents(self, page: "PageObject") -> None:
+        """Remove the content streams of a page from the object cache."""
+        contents = page.raw_get(PG.CONTENTS) if PG.CONTENTS in page else None
+        refs = [contents] if isinstance(contents, IndirectObject) else []
+        if contents is not None:
+            contents = contents.get_object()
+            if isinstance(contents, ArrayObject):
+                refs.extend(item for item in contents if isinstance(item, IndirectObject))
+        for ref in refs:
+            if ref.pdf is self:
+                self.resolved_objects.pop((ref.generation, ref.idnum), None)
+
     def add_form_topname(self, name: str) -> Optional[DictionaryObject]:
         """
         Add a top level form that groups all form fields below it.
@@ -1350,3 +1708,34 @@ class PdfReader(PdfDocCommon):
             data = {k: v for k, v in data.items() if k not in exclude}
 
         return data
+
+
+def _open_worker_reader(
+    data: Union[bytes, mmap.mmap],
+    strict: bool,
+    encryption_key: Optional[tuple[Optional[bytes], PasswordType]],
+) -> PdfReader:
+    """Open a reader on the document data for a text extraction worker."""
+    reader = PdfReader(BytesIO(data), strict=strict)
+    if encryption_key is not None and reader._encryption is not None:
+        # Reuse the key found by the parent reader, the password is not kept
+        reader._encryption._key, reader._encryption._password_type = encryption_key
+    return reader
+
+
+def _extract_text_worker(
+    conn: Any,
+    data: bytes,
+    strict: bool,
+    encryption_key: Optional[tuple[Optional[bytes], PasswordType]],
+    page_numbers: list[int],
+    kwargs: dict[str, Any],
+) -> None:
+    """Send the text of the pages, or the exception raised, to the parent process."""
+    try:
+        reader = _open_worker_reader(data, strict, encryption_key)
+        conn.send([reader.pages[i].extract_text(**kwargs) for i in page_numbers])
+    except Exception as exc:
+        conn.send(exc)
+    finally:
+        conn.close()
@@ -31,12 +31,13 @@ __author_email__ = "biziqe@mathieu.fenniak.net"
 
 import functools
 import logging
+import mmap
 import re
 import sys
 import warnings
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from io import DEFAULT_BUFFER_SIZE
+from io import DEFAULT_BUFFER_SIZE, BytesIO
 from os import SEEK_CUR
 from re import Pattern
 from typing import (
@@ -75,6 +76,45 @@ StreamType = IO[Any]
 StrByteType = Union[str, StreamType]
 
 
+class MappedFile(mmap.mmap):
+    """
+    Read-only memory map used as a PdfReader stream.
+
+    Unlike mmap.mmap, seeking outside of the mapping is clamped to its
+    bounds, as BytesIO does, instead of raising ValueError.
+    """
+
+    def seek(self, pos: int, whence: int = 0) -> int:  # type: ignore[override]
+        if whence == 1:
+            pos += self.tell()
+        elif whence == 2:
+            pos += len(self)
+        pos = min(max(pos, 0), len(self))
+        super().seek(pos, 0)
+        return pos
+
+
+def stream_buffer(stream: StreamType) -> Optional[Union[bytes, mmap.mmap]]:
+    """
+    Return the whole content of an in-memory or memory-mapped stream.
+
+    The content is not copied: BytesIO.getvalue() shares its buffer and a
+    memory map can be searched and sliced directly.
+
+    Args:
+        stream: The stream.
+
+    Returns:
+        The content, or ``None`` for other kinds of streams.
+
+    """
+    if isinstance(stream, BytesIO):
+        return stream.getvalue()
+    if isinstance(stream, mmap.mmap):
+        return stream
+    return None
+
+
 def parse_iso8824_date(text: Optional[str]) -> Optional[datetime]:
     orgtext = text
     if not text:
@@ -154,6 +194,8 @@ def _get_max_pdf_version_header(header1: str, header2: str) -> str:
 WHITESPACES = (b"\x00", b"\t", b"\n", b"\f", b"\r", b" ")
 WHITESPACES_AS_BYTES = b"".join(WHITESPACES)
 WHITESPACES_AS_REGEXP = b"[" + WHITESPACES_AS_BYTES + b"]"
+# Characters matching bytes.isspace()
+_ISSPACE_PATTERN = re.compile(rb"\s")
 
 
 def read_until_whitespace(stream: StreamType, maxchars: Optional[int] = None) -> bytes:
@@ -170,6 +212,18 @@ def read_until_whitespace(stream: StreamType, maxchars: Optional[int] = None) ->
         The data which was read.
 
     """
+    data = stream_buffer(stream)
+    if data is not None:
+        pos = stream.tell()
+        limit = pos + maxchars if maxchars else len(data)
+        m = _ISSPACE_PATTERN.search(data, pos, limit)
+        if m is None:
+            txt = data[pos:limit]
+            stream.seek(pos + len(txt), 0)
+        else:
+            txt = data[pos : m.start()]
+            stream.seek(m.end(), 0)  # the whitespace is consumed
+        return txt
     txt = b""
     while True:
         tok = stream.read(1)
@@ -254,6 +308,15 @@ def read_until_regex(stream: StreamType, regex: Pattern[bytes]) -> bytes:
         The read bytes.
 
     """
+    data = stream_buffer(stream)
+    if data is not None:
+        # Search the whole buffer at once instead of growing the token
+        # 16 bytes at a time, which is quadratic for long tokens.
+        pos = stream.tell()
+        m = regex.search(data, pos)
+        end = len(data) if m is None else m.start()
+        stream.seek(end, 0)
+        return data[pos:end]
     name = b""
     while True:
         tok = stream.read(16)
@@ -37,12 +37,14 @@ __author_email__ = "biziqe@mathieu.fenniak.net"
 
 import math
 import os
+import re
 import shutil
 import struct
 import subprocess
 import zlib
 from base64 import a85decode
 from dataclasses import dataclass
+from itertools import accumulate, groupby
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import Any, Optional, Union, cast
@@ -127,28 +129,222 @@ def decompress(data: bytes) -> bytes:
             except zlib.error:
                 pass
 
-        # If still failing, then try with increased window size.
-        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 32)
-        result_str = b""
-        remaining_limit = ZLIB_MAX_OUTPUT_LENGTH
-        data_single_bytes = [data[i : i + 1] for i in range(len(data))]
-        known_errors = set()
-        for index, b in enumerate(data_single_bytes):
-            try:
-                decompressed = decompressor.decompress(b, max_length=remaining_limit)
-                result_str += decompressed
-                remaining_limit -= len(decompressed)
-                if remaining_limit <= 0:
-                    raise LimitReachedError(
-                        f"Limit reached while decompressing. {len(data_single_bytes) - index} bytes remaining."
-                    )
-            except zlib.error as error:
-                error_str = str(error)
-                if error_str in known_errors:
-                    continue
-                logger_warning(error_str, __name__)
-                known_errors.add(error_str)
-        return result_str
+        # If still failing, then try with increased window size, keeping
+        # everything decompressed before the corrupt data and any complete
+        # zlib stream found after it.
+        return _decompress_recover(data)
+
+
+# Initial size of the pieces fed to the decompressor by _decompress_recover
+ZLIB_RECOVERY_CHUNK_SIZE = 65_536
+# Start of a zlib stream (CMF and FLG bytes) with a 32K window and no preset
+# dictionary, for the usual compression levels
+_ZLIB_HEADER_PATTERN = re.compile(rb"\x78[\x01\x5e\x9c\xda]")
+
+
+def _inflate_until_error(
+    data: bytes, start: int, wbits: int, remaining_limit: Optional[int]
+) -> tuple[list[bytes], int, bool, Optional[zlib.error]]:
+    """
+    Decompress data[start:] until the end of the stream or the first error.
+
+    The data is fed in pieces. When a piece fails, the decompressor is
+    restored to its state before the piece and the piece is fed again in
+    smaller pieces, down to single bytes, so that all the output preceding
+    the error is kept.
+
+    Args:
+        data: The compressed data.
+        start: The offset of the zlib stream in data.
+        wbits: See https://docs.python.org/3/library/zlib.html#zlib.decompressobj
+        remaining_limit: The maximum output length, or None for no limit.
+
+    Returns:
+        The decompressed pieces, the offset where decompression stopped,
+        whether the end of the stream was reached and the error, if any.
+
+    """
+    decompressor = zlib.decompressobj(wbits)
+    output: list[bytes] = []
+    pos = start
+    step = ZLIB_RECOVERY_CHUNK_SIZE
+    while pos < len(data) and not decompressor.eof:
+        if remaining_limit is not None and remaining_limit <= 0:
+            raise LimitReachedError(
+                f"Limit reached while decompressing. {len(data) - pos} bytes remaining."
+            )
+        checkpoint = decompressor.copy()
+        piece = data[pos : pos + step]
+        try:
+            decompressed = decompressor.decompress(piece, max_length=remaining_limit or 0)
+        except zlib.error as error:
+            if step == 1:
+                return output, pos, False, error
+            decompressor = checkpoint
+            step = max(1, step // 16)
+            continue
+        if decompressor.unconsumed_tail:
+            raise LimitReachedError(
+                f"Limit reached while decompressing. {len(data) - pos} bytes remaining."
+            )
+        if remaining_limit is not None:
+            remaining_limit -= len(decompressed)
+        output.append(decompressed)
+        pos += len(piece) - len(decompressor.unused_data)
+    return output, pos, decompressor.eof, None
+
+
+def _decompress_recover(data: bytes) -> bytes:
+    """
+    Decompress corrupt zlib data as far as possible.
+
+    The output decompressed before the first error is kept. Then the rest
+    of the data is searched for the start of another zlib stream, which is
+    kept only if it decompresses to its end without error. The work spent
+    on rejected candidates is bounded by a few times the input size.
+
+    Args:
+        data: The compressed data.
+
+    Returns:
+        The recovered data.
+
+    """
+    remaining_limit = ZLIB_MAX_OUTPUT_LENGTH or None
+    output, pos, _, error = _inflate_until_error(data, 0, zlib.MAX_WBITS | 32, remaining_limit)
+    if error is None:
+        return b"".join(output)
+    logger_warning(str(error), __name__)
+    if remaining_limit is not None:
+        remaining_limit -= sum(map(len, output))
+    search_budget = 4 * len(data)
+    search_from = pos + 1
+    while search_budget > 0 and (match := _ZLIB_HEADER_PATTERN.search(data, search_from)) is not None:
+        candidate, end, eof, _ = _inflate_until_error(data, match.start(), zlib.MAX_WBITS, remaining_limit)
+        if not eof:
+            search_budget -= end - match.start() + 1
+            search_from = match.start() + 1
+            continue
+        logger_warning(
+            f"Skipped {match.start() - pos} bytes of corrupt data at offset {pos}.", __name__
+        )
+        output.extend(candidate)
+        if remaining_limit is not None:
+            remaining_limit -= sum(map(len, candidate))
+        pos = search_from = end
+    return b"".join(output)
+
+
+_numpy_module: Any = None
+
+
+def _numpy() -> Any:
+    """Return the numpy module, or None when it is not installed."""
+    global _numpy_module  # noqa: PLW0603
+    if _numpy_module is None:
+        try:
+            import numpy  # noqa: PLC0415
+
+            _numpy_module = numpy
+        except ImportError:
+            _numpy_module = False
+    return _numpy_module or None
+
+
+def _accumulate_strided(data: bytearray, start: int, end: int, step: int, count: Optional[int] = None) -> None:
+    """
+    Add to each byte of data[start:end] the decoded byte step positions before it.
+
+    The first ``count`` bytes (default: ``step``) start the running sums.
+    """
+    for k in range(start, min(start + (step if count is None else count), end)):
+        data[k:end:step] = bytes(x & 0xFF for x in accumulate(data[k:end:step]))
+
+
+def _png_unfilter_row(data: bytearray, row: int, prev_row: int, rowlength: int, bpp: int) -> None:
+    """
+    Undo the PNG filter of the row starting at data[row] in place.
+
+    The first byte of the row is the filter type; prev_row is the start of
+    the previous (already decoded) row, or -1 for the first row.
+    """
+    filter_byte = data[row]
+    start, end = row + 1, row + rowlength
+    if filter_byte == 0:
+        # PNG None Predictor
+        return
+    if filter_byte == 1:
+        # PNG Sub Predictor
+        if bpp > 0:
+            _accumulate_strided(data, start, end, bpp)
+            return
+        for i in range(start + bpp, end):
+            data[i] = (data[i] + data[i - bpp]) % 256
+        return
+    if prev_row < 0:
+        # The row above the first one is all zeros
+        prev = bytes(rowlength)
+        prev_row = 0
+    else:
+        prev = data
+    up_start = prev_row + 1
+    if filter_byte == 2:
+        # PNG Up Predictor: add both rows at once, byte-wise without carries
+        size = rowlength - 1
+        a = int.from_bytes(data[start:end], "big")
+        b = int.from_bytes(prev[up_start : up_start + size], "big")
+        low, high = _byte_masks(size)
+        data[start:end] = (((a & low) + (b & low)) ^ ((a ^ b) & high)).to_bytes(size, "big")
+    elif filter_byte == 3:
+        # PNG Average Predictor
+        offset = up_start - start
+        for i in range(start, min(start + bpp, end)):
+            data[i] = (data[i] + prev[i + offset] // 2) % 256
+        for i in range(start + bpp, end):
+            data[i] = (data[i] + (data[i - bpp] + prev[i + offset]) // 2) % 256
+    elif filter_byte == 4:
+        # PNG Paeth Predictor
+        offset = up_start - start
+        for i in range(start, min(start + bpp, end)):
+            data[i] = (data[i] + prev[i + offset]) % 256
+        for i in range(start + bpp, end):
+            left = data[i - bpp]
+            up = prev[i + offset]
+            up_left = prev[i + offset - bpp]
+
+            p = left + up - up_left
+            dist_left = abs(p - left)
+            dist_up = abs(p - up)
+            dist_up_left = abs(p - up_left)
+
+            if dist_left <= dist_up and dist_left <= dist_up_left:
+                paeth = left
+            elif dist_up <= dist_up_left:
+                paeth = up
+            else:
+                paeth = up_left
+
+            data[i] = (data[i] + paeth) % 256
+    else:
+        raise PdfReadError(
+            f"Unsupported PNG filter {filter_byte!r}"
+        )  # pragma: no cover
+
+
+_BYTE_MASKS: dict[int, tuple[int, int]] = {}
+
+
+def _byte_masks(size: int) -> tuple[int, int]:
+    """Masks selecting the low 7 bits and the high bit of each of size bytes."""
+    masks = _BYTE_MASKS.get(size)
+    if masks is None:
+        masks = (
+            int.from_bytes(b"\x7f" * size, "big"),
+            int.from_bytes(b"\x80" * size, "big"),
+        )
+        if len(_BYTE_MASKS) < 64:
+            _BYTE_MASKS[size] = masks
+    return masks
 
 
 class FlateDecode:
@@ -210,12 +406,9 @@ class FlateDecode:
             # TIFF prediction:
             if predictor == 2:
                 rowlength -= 1  # remove the predictor byte
-                bpp = rowlength // columns
-                str_data = bytearray(str_data)
-                for i in range(len(str_data)):
-                    if i % rowlength >= bpp:
-                        str_data[i] = (str_data[i] + str_data[i - bpp]) % 256
-                str_data = bytes(str_data)
+                str_data = FlateDecode._decode_tiff_prediction(
+                    str_data, columns, rowlength
+                )
             # PNG prediction:
             elif 10 <= predictor <= 15:
                 str_data = FlateDecode._decode_png_prediction(
@@ -225,6 +418,31 @@ class FlateDecode:
                 raise PdfReadError(f"Unsupported flatedecode predictor {predictor!r}")
         return str_data
 
+    @staticmethod
+    def _decode_tiff_prediction(data: bytes, columns: int, rowlength: int) -> bytes:
+        # Each byte is stored as the difference to the byte one pixel to its left
+        bpp = rowlength // columns
+        if bpp == 0:
+            str_data = bytearray(data)
+            for i in range(len(str_data)):
+                if i % rowlength >= bpp:
+                    str_data[i] = (str_data[i] + str_data[i - bpp]) % 256
+            return bytes(str_data)
+        np = _numpy()
+        if np is not None:
+            arr = np.frombuffer(data, dtype=np.uint8).copy()
+            full = len(arr) - len(arr) % rowlength
+            rows = arr[:full].reshape(-1, rowlength)
+            tail = arr[full:].reshape(1, -1)
+            for block in (rows, tail):
+                for k in range(min(bpp, block.shape[1])):
+                    np.cumsum(block[:, k::bpp], axis=1, dtype=np.uint8, out=block[:, k::bpp])
+            return arr.tobytes()
+        str_data = bytearray(data)
+        for row in range(0, len(str_data), rowlength):
+            _accumulate_strided(str_data, row, min(row + rowlength, len(str_data)), bpp)
+        return bytes(str_data)
+
     @staticmethod
     def _decode_png_prediction(data: bytes, columns: int, rowlength: int) -> bytes:
         # PNG prediction can vary from row to row
@@ -232,62 +450,67 @@ class FlateDecode:
             logger_warning("Image data is not rectangular. Adding padding.", __name__)
             data += b"\x00" * (rowlength - remainder)
             assert len(data) % rowlength == 0
-        output = []
-        prev_rowdata = (0,) * rowlength
         bpp = (rowlength - 1) // columns  # recomputed locally to not change params
-        for row in range(0, len(data), rowlength):
-            rowdata: list[int] = list(data[row : row + rowlength])
-            filter_byte = rowdata[0]
+        np = _numpy()
+        if np is not None and bpp > 0:
+            return FlateDecode._decode_png_prediction_numpy(np, data, rowlength, bpp)
+        str_data = bytearray(data)
+        prev_row = -1
+        row = 0
+        for filter_byte, group in groupby(str_data[::rowlength]):
+            nrows = sum(1 for _ in group)
+            end = row + nrows * rowlength
+            if filter_byte == 2 and nrows > rowlength:
+                # Long run of Up rows (typical of xref streams): a running sum
+                # down each column, starting from the previous row
+                first = prev_row if prev_row >= 0 else row
+                for col in range(first + 1, first + rowlength):
+                    _accumulate_strided(str_data, col, end, rowlength, 1)
+            else:
+                for r in range(row, end, rowlength):
+                    _png_unfilter_row(str_data, r, prev_row, rowlength, bpp)
+                    prev_row = r
+            row = end
+            prev_row = row - rowlength
+        # Drop the filter bytes
+        del str_data[::rowlength]
+        return bytes(str_data)
 
-            if filter_byte == 0:
-                # PNG None Predictor
-                pass
+    @staticmethod
+    def _decode_png_prediction_numpy(np: Any, data: bytes, rowlength: int, bpp: int) -> bytes:
+        # Rows with the same filter are decoded together: Up is a running sum
+        # down the columns and Sub a running sum along each row, which NumPy
+        # computes modulo 256 when accumulating in uint8.
+        arr = np.frombuffer(data, dtype=np.uint8).reshape(-1, rowlength).copy()
+        nrows = len(arr)
+        if nrows == 0:
+            return b""
+        filters = arr[:, 0]
+        invalid = np.flatnonzero(filters > 4)
+        if len(invalid):
+            raise PdfReadError(
+                f"Unsupported PNG filter {int(filters[invalid[0]])!r}"
+            )  # pragma: no cover
+        # Boundaries of the runs of rows sharing a filter byte
+        bounds = [0, *(np.flatnonzero(np.diff(filters)) + 1).tolist(), nrows]
+        for row, end in zip(bounds, bounds[1:]):
+            filter_byte = int(filters[row])
+            block = arr[row:end, 1:]
+            if filter_byte == 2:
+                if row > 0:
+                    block[0] += arr[row - 1, 1:]
+                np.cumsum(block, axis=0, dtype=np.uint8, out=block)
             elif filter_byte == 1:
-                # PNG Sub Predictor
-                for i in range(bpp + 1, rowlength):
-                    rowdata[i] = (rowdata[i] + rowdata[i - bpp]) % 256
-            elif filter_byte == 2:
-                # PNG Up Predictor
-                for i in range(1, rowlength):
-                    rowdata[i] = (rowdata[i] + prev_rowdata[i]) % 256
-            elif filter_byte == 3:
-                # PNG Average Predictor
-                for i in range(1, bpp + 1):
-                    floor = prev_rowdata[i] // 2
-                    rowdata[i] = (rowdata[i] + floor) % 256
-                for i in range(bpp + 1, rowlength):
-                    left = rowdata[i - bpp]
-                    floor = (left + prev_rowdata[i]) // 2
-                    rowdata[i] = (rowdata[i] + floor) % 256
-            elif filter_byte == 4:
-                # PNG Paeth Predictor
-                for i in range(1, bpp + 1):
-                    rowdata[i] = (rowdata[i] + prev_rowdata[i]) % 256
-                for i in range(bpp + 1, rowlength):
-                    left = rowdata[i - bpp]
-                    up = prev_rowdata[i]
-                    up_left = prev_rowdata[i - bpp]
-
-                    p = left + up - up_left
-                    dist_left = abs(p - left)
-                    dist_up = abs(p - up)
-                    dist_up_left = abs(p - up_left)
-
-                    if dist_left <= dist_up and dist_left <= dist_up_left:
-                        paeth = left
-                    elif dist_up <= dist_up_left:
-                        paeth = up
-                    else:
-                        paeth = up_left
-
-                    rowdata[i] = (rowdata[i] + paeth) % 256
-            else:
-                raise PdfReadError(
-                    f"Unsupported PNG filter {filter_byte!r}"
-                )  # pragma: no cover
-            prev_rowdata = tuple(rowdata)
-            output.extend(rowdata[1:])
-        return bytes(output)
+                for k in range(bpp):
+                    np.cumsum(block[:, k::bpp], axis=1, dtype=np.uint8, out=block[:, k::bpp])
+            elif filter_byte in (3, 4):
+                # Average and Paeth depend on the decoded byte to the left
+                for r in range(row, end):
+                    buf = bytearray(arr[r - 1].tobytes() if r > 0 else bytes(rowlength))
+                    buf += arr[r].tobytes()
+                    _png_unfilter_row(buf, rowlength, 0 if r > 0 else -1, rowlength, bpp)
+                    arr[r] = np.frombuffer(buf, dtype=np.uint8, offset=rowlength)
+        return arr[:, 1:].tobytes()
 
     @staticmethod
     def encode(data: bytes, level: int = -1) -> bytes:
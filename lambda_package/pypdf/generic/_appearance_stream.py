@@ -4,7 +4,6 @@ from enum import IntEnum
 from typing import Any, Optional, Union, cast
 
 from .._codecs import fill_from_encoding
-from .._codecs.core_fontmetrics import CORE_FONT_METRICS
 from .._font import Font
 from .._utils import logger_warning
 from ..constants import AnnotationDictionaryAttributes, BorderStyles, FieldDictionaryAttributes
@@ -348,6 +347,8 @@ class TextStreamAppearance(BaseStreamAppearance):
         else:
             logger_warning(f"Font dictionary for {font_name} not found; defaulting to Helvetica.", __name__)
             font_name = "/Helv"
+            from .._codecs.core_fontmetrics import CORE_FONT_METRICS  # noqa: PLC0415
+
             font_resource = DictionaryObject({
                 NameObject("/Subtype"): NameObject("/Type1"),
                 NameObject("/Name"): NameObject("/Helv"),
@@ -478,6 +479,8 @@ class TextStreamAppearance(BaseStreamAppearance):
         )
         document_font_resources = document_resources.get("/Font", DictionaryObject()).get_object()
         # CORE_FONT_METRICS is the dict with Standard font metrics
+        from .._codecs.core_fontmetrics import CORE_FONT_METRICS  # noqa: PLC0415
+
         if font_name not in document_font_resources and font_name.removeprefix("/") not in CORE_FONT_METRICS:
             # ...or AcroForm dictionary
             document_resources = cast(
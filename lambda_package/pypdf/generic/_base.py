@@ -887,6 +887,11 @@ class NameObject(str, PdfObject):  # noqa: SLOT000
         if name != NameObject.prefix:
             raise PdfReadError("Name read error")
         name += read_until_regex(stream, NameObject.delimiter_pattern)
+        return NameObject._decode(name, pdf)
+
+    @staticmethod
+    def _decode(name: bytes, pdf: Any) -> "NameObject":  # PdfReader
+        """Build a NameObject from its raw bytes, including the leading '/'."""
         try:
             # Name objects should represent irregular characters
             # with a '#' followed by the symbol's hex number
@@ -32,7 +32,7 @@ __author_email__ = "biziqe@mathieu.fenniak.net"
 import logging
 import re
 import sys
-from collections.abc import Iterable, Sequence
+from collections.abc import Iterable, Iterator, Sequence
 from io import BytesIO
 from math import ceil
 from typing import (
@@ -53,6 +53,7 @@ from .._utils import (
     read_until_regex,
     read_until_whitespace,
     skip_over_comment,
+    stream_buffer,
 )
 from ..constants import (
     CheckboxRadioButtonAttributes,
@@ -84,6 +85,12 @@ from ._image_inline import (
     extract_inline__run_length_decode,
     extract_inline_default,
 )
+from ._lexer import (
+    read_object_from_buffer,
+    read_operator_from_buffer,
+    skip_comment,
+    skip_whitespace,
+)
 from ._utils import read_hex_string_from_stream, read_string_from_stream
 
 if sys.version_info >= (3, 11):
@@ -634,7 +641,11 @@ class DictionaryObject(dict[Any, Any], PdfObject):
             if length is None:  # if the PDF is damaged
                 length = -1
             pstart = stream.tell()
-            if length >= 0:
+            lazy_threshold = getattr(pdf, "_lazy_stream_threshold", None)
+            if lazy_threshold is not None and length >= lazy_threshold:
+                data["__streamdata__"] = _DeferredStreamData(stream, pstart, length)
+                stream.seek(length, 1)
+            elif length >= 0:
                 data["__streamdata__"] = stream.read(length)
             else:
                 data["__streamdata__"] = read_until_regex(
@@ -643,6 +654,8 @@ class DictionaryObject(dict[Any, Any], PdfObject):
             e = read_non_whitespace(stream)
             ndstream = stream.read(8)
             if (e + ndstream) != b"endstream":
+                if isinstance(data["__streamdata__"], _DeferredStreamData):
+                    data["__streamdata__"] = data["__streamdata__"].read()
                 # the odd PDF file has a length that is too long, so
                 # we need to read backwards to find the "endstream" ending.
                 # ReportLab (unknown version) generates files with this bug,
@@ -900,11 +913,44 @@ def _reset_node_tree_relationship(child_obj: Any) -> None:
         del child_obj[NameObject("/Prev")]
 
 
+class _DeferredStreamData:
+    """
+    Location of stream data that is read on first access.
+
+    Used by readers created with a *lazy_stream_threshold*, so that large
+    streams whose dictionary is inspected but whose data is never used,
+    such as images during text extraction, are not read.
+    """
+
+    def __init__(self, stream: StreamType, offset: int, length: int) -> None:
+        self.stream = stream
+        self.offset = offset
+        self.length = length
+
+    def read(self) -> bytes:
+        pos = self.stream.tell()
+        self.stream.seek(self.offset, 0)
+        data = self.stream.read(self.length)
+        self.stream.seek(pos, 0)
+        return data
+
+
 class StreamObject(DictionaryObject):
     def __init__(self) -> None:
         self._data: bytes = b""
         self.decoded_self: Optional[DecodedStreamObject] = None
 
+    @property
+    def _data(self) -> Any:
+        data = self._stored_data
+        if isinstance(data, _DeferredStreamData):
+            data = self._stored_data = data.read()
+        return data
+
+    @_data.setter
+    def _data(self, value: Any) -> None:
+        self._stored_data = value
+
     def replicate(
         self,
         pdf_dest: PdfWriterProtocol,
@@ -1273,6 +1319,13 @@ class ContentStream(DecodedStreamObject):
 
     def _parse_content_stream(self, stream: StreamType) -> None:
         # 7.8.2 Content Streams
+        self._operations.extend(self._iter_parse_content_stream(stream))
+
+    def _iter_parse_content_stream(self, stream: StreamType) -> Iterator[tuple[Any, bytes]]:
+        """Parse the operations of the stream, yielding each one as soon as it is read."""
+        if isinstance(stream, BytesIO):
+            yield from self._iter_parse_content_stream_buffer(stream)
+            return
         stream.seek(0, 0)
         operands: list[Union[int, str, PdfObject]] = []
         while True:
@@ -1287,9 +1340,9 @@ class ContentStream(DecodedStreamObject):
                     # mechanism is required, of course... thanks buddy...
                     assert operands == []
                     ii = self._read_inline_image(stream)
-                    self._operations.append((ii, b"INLINE IMAGE"))
+                    yield ii, b"INLINE IMAGE"
                 else:
-                    self._operations.append((operands, operator))
+                    yield operands, operator
                     operands = []
             elif peek == b"%":
                 # If we encounter a comment in the content stream, we have to
@@ -1302,6 +1355,48 @@ class ContentStream(DecodedStreamObject):
             else:
                 operands.append(read_object(stream, None, self.forced_encoding))
 
+    def _iter_parse_content_stream_buffer(self, stream: BytesIO) -> Iterator[tuple[Any, bytes]]:
+        """
+        Same as :meth:`_iter_parse_content_stream`, scanning the in-memory data
+        with an integer cursor instead of reading the stream byte by byte.
+
+        The stream is only used for inline images and for operands the
+        buffer lexer leaves to :func:`read_object`.
+        """
+        data = stream.getvalue()
+        length = len(data)
+        pos = 0
+        operands: list[Union[int, str, PdfObject]] = []
+        while True:
+            pos = skip_whitespace(data, pos)
+            if pos >= length:
+                break
+            peek = data[pos : pos + 1]
+            if peek.isalpha() or peek in (b"'", b'"'):
+                operator, pos = read_operator_from_buffer(data, pos)
+                if operator == b"BI":
+                    # begin inline image
+                    assert operands == []
+                    stream.seek(pos, 0)
+                    ii = self._read_inline_image(stream)
+                    pos = stream.tell()
+                    yield ii, b"INLINE IMAGE"
+                else:
+                    yield operands, operator
+                    operands = []
+            elif peek == b"%":
+                pos = skip_comment(data, pos)
+            else:
+                result = read_object_from_buffer(data, pos, None, self.forced_encoding)
+                if result is None:
+                    stream.seek(pos, 0)
+                    operands.append(read_object(stream, None, self.forced_encoding))
+                    pos = stream.tell()
+                else:
+                    operand, pos = result
+                    operands.append(operand)
+        stream.seek(pos, 0)
+
     def _read_inline_image(self, stream: StreamType) -> dict[str, Any]:
         # begin reading just after the "BI" - begin image
         # first read the dictionary of settings.
@@ -1416,6 +1511,23 @@ class ContentStream(DecodedStreamObject):
         self._operations = operations
         self._data = b""
 
+    def iter_operations(self) -> Iterator[tuple[Any, bytes]]:
+        """
+        Iterate over the ``(operands, operator)`` tuples of the stream.
+
+        Unlike :attr:`operations`, the data is parsed while iterating and the
+        operations are not stored, so memory does not grow with the stream
+        and parsing stops when the caller stops iterating. If the operations
+        are already parsed, they are returned as they are.
+
+        Returns:
+            An iterator over the operations, in stream order.
+
+        """
+        if self._operations or not self._data:
+            return iter(self._operations)
+        return self._iter_parse_content_stream(BytesIO(self._data))
+
     def isolate_graphics_state(self) -> None:
         if self._operations:
             self._operations.insert(0, ([], b"q"))
@@ -1437,6 +1549,12 @@ def read_object(
     pdf: Optional[PdfReaderProtocol],
     forced_encoding: Union[None, str, list[str], dict[int, str]] = None,
 ) -> Union[PdfObject, int, str, ContentStream]:
+    data = stream_buffer(stream)
+    if data is not None:
+        result = read_object_from_buffer(data, stream.tell(), pdf, forced_encoding)
+        if result is not None:
+            stream.seek(result[1], 0)
+            return result[0]
     tok = stream.read(1)
     stream.seek(-1, 1)  # reset to start
     if tok == b"/":
@@ -0,0 +1,256 @@
+# Copyright (c) 2024, pypdf contributors
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# * Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+# * The name of the author may not be used to endorse or promote products
+# derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Cursor-based tokenizer over in-memory PDF data.
+
+The ``read_*_from_stream`` functions consume a stream one byte (or a few
+bytes) at a time. When the whole data is in memory or memory-mapped, the
+functions below scan it directly with precompiled regular expressions and
+an integer position instead, and only copy the bytes of the token being
+built.
+
+The readers return ``(object, new_position)``. ``read_object_from_buffer``
+returns ``None`` for tokens it does not handle (dictionaries, comments,
+invalid data), so that callers can fall back to the stream-based parser and
+keep its error handling.
+"""
+
+import re
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+from .._utils import logger_warning
+from ..errors import STREAM_TRUNCATED_PREMATURELY, PdfStreamError
+from ._base import (
+    BooleanObject,
+    ByteStringObject,
+    FloatObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    PdfObject,
+    TextStringObject,
+)
+from ._utils import __ESCAPE_DICT__, create_string_object
+
+if TYPE_CHECKING:
+    from ._data_structures import ArrayObject
+
+WHITESPACE_PATTERN = re.compile(rb"[\x00\t\n\f\r ]*")
+# ArrayObject.read_from_stream skips bytes.isspace() characters
+ARRAY_WHITESPACE_PATTERN = re.compile(rb"\s*")
+# Same delimiters as NameObject.delimiter_pattern
+NAME_PATTERN = re.compile(rb"/[^\s()<>\[\]{}/%]*")
+OPERATOR_PATTERN = re.compile(rb"[^\s()<>\[\]{}/%]*")
+# Same characters as NumberObject.NumberPattern
+NUMBER_PATTERN = re.compile(rb"[+-.0-9]*")
+# Same as IndirectPattern, with the object number sign kept in the group
+INDIRECT_PATTERN = re.compile(rb"([+-]?\d+)\s+(\d+)\s+R[^a-zA-Z]")
+STRING_SPECIAL_PATTERN = re.compile(rb"[()\\]")
+EOL_PATTERN = re.compile(rb"[\r\n]")
+
+_ESCAPES = {key[0]: value for key, value in __ESCAPE_DICT__.items()}
+_NUMBER_START = frozenset(b"0123456789+-.")
+_OPEN_PAREN, _CLOSE_PAREN, _BACKSLASH = b"()\\"
+_CR, _LF = b"\r\n"
+
+
+def skip_whitespace(data: bytes, pos: int) -> int:
+    """Return the position of the next non-whitespace byte."""
+    return WHITESPACE_PATTERN.match(data, pos).end()  # type: ignore[union-attr]
+
+
+def skip_comment(data: bytes, pos: int) -> int:
+    """Return the position after the end of line closing a comment."""
+    m = EOL_PATTERN.search(data, pos)
+    return len(data) if m is None else m.end()
+
+
+def read_string_from_buffer(
+    data: bytes,
+    pos: int,
+    forced_encoding: Union[None, str, list[str], dict[int, str]] = None,
+) -> tuple[Union[TextStringObject, ByteStringObject], int]:
+    """Buffer counterpart of :func:`read_string_from_stream`."""
+    pos += 1  # opening parenthesis
+    length = len(data)
+    parens = 1
+    txt = bytearray()
+    while True:
+        m = STRING_SPECIAL_PATTERN.search(data, pos)
+        if m is None:
+            raise PdfStreamError(STREAM_TRUNCATED_PREMATURELY)
+        special = m.start()
+        txt += data[pos:special]
+        tok = data[special]
+        pos = special + 1
+        if tok == _OPEN_PAREN:
+            parens += 1
+        elif tok == _CLOSE_PAREN:
+            parens -= 1
+            if parens == 0:
+                break
+        else:
+            if pos >= length:
+                raise PdfStreamError(STREAM_TRUNCATED_PREMATURELY)
+            tok = data[pos]
+            pos += 1
+            if tok in _ESCAPES:
+                txt.append(_ESCAPES[tok])
+                continue
+            if 0x30 <= tok <= 0x37:
+                # Up to three octal digits, see read_string_from_stream
+                start = pos - 1
+                while pos < length and pos - start < 3 and 0x30 <= data[pos] <= 0x37:
+                    pos += 1
+                i = int(data[start:pos], base=8)
+                if i > 255:
+                    txt.append(_BACKSLASH)
+                    pos = start
+                else:
+                    txt.append(i)
+                continue
+            if tok in (_CR, _LF):
+                # Escaped line break: consume a multi-char EOL, add nothing
+                if pos < length and data[pos] in (_CR, _LF):
+                    pos += 1
+                continue
+            msg = f"Unexpected escaped string: {bytes((tok,)).decode('utf-8', 'ignore')}"
+            logger_warning(msg, __name__)
+            txt.append(_BACKSLASH)
+        txt.append(tok)
+    return create_string_object(bytes(txt), forced_encoding), pos
+
+
+def read_hex_string_from_buffer(
+    data: bytes,
+    pos: int,
+    forced_encoding: Union[None, str, list[str], dict[int, str]] = None,
+) -> tuple[Union[TextStringObject, ByteStringObject], int]:
+    """Buffer counterpart of :func:`read_hex_string_from_stream`."""
+    end = data.find(b">", pos + 1)
+    x = bytes(data[pos + 1 : end if end != -1 else len(data)]).translate(
+        None, b"\x00\t\n\f\r "
+    )
+    if end == -1:
+        # Report invalid digits first, as the stream-based reader would
+        for i in range(0, len(x) - 1, 2):
+            int(x[i : i + 2], base=16)
+        raise PdfStreamError(STREAM_TRUNCATED_PREMATURELY)
+    if len(x) % 2:
+        x += b"0"
+    arr = [int(x[i : i + 2], base=16) for i in range(0, len(x), 2)]
+    return create_string_object(bytes(arr), forced_encoding), end + 1
+
+
+def read_array_from_buffer(
+    data: bytes,
+    pos: int,
+    pdf: Any,
+    forced_encoding: Union[None, str, list[str], dict[int, str]] = None,
+) -> Optional[tuple["ArrayObject", int]]:
+    """
+    Read an array starting at ``[``.
+
+    Returns:
+        The array and the position after ``]``, or ``None`` if the array
+        contains something only the stream-based parser handles.
+
+    """
+    from ._data_structures import ArrayObject  # noqa: PLC0415
+
+    pos += 1
+    length = len(data)
+    items = ArrayObject()
+    while True:
+        pos = ARRAY_WHITESPACE_PATTERN.match(data, pos).end()  # type: ignore[union-attr]
+        if pos >= length:
+            return items, pos
+        if data[pos] == 0x5D:  # ]
+            return items, pos + 1
+        result = read_object_from_buffer(data, pos, pdf, forced_encoding)
+        if result is None:
+            return None
+        obj, pos = result
+        items.append(obj)
+
+
+def read_object_from_buffer(
+    data: bytes,
+    pos: int,
+    pdf: Any,
+    forced_encoding: Union[None, str, list[str], dict[int, str]] = None,
+) -> Optional[tuple[PdfObject, int]]:
+    """
+    Read the object starting at ``pos``.
+
+    Returns:
+        The object and the position after it, or ``None`` if the token must
+        be read with :func:`read_object` instead.
+
+    """
+    tok = data[pos : pos + 1]
+    # Most frequent tokens first: content streams are mostly numbers
+    if tok and tok[0] in _NUMBER_START:
+        m = INDIRECT_PATTERN.match(data, pos, pos + 20)
+        if m is not None:
+            if pdf is None:
+                return None
+            return IndirectObject(int(m.group(1)), int(m.group(2)), pdf), m.end() - 1
+        end = NUMBER_PATTERN.match(data, pos).end()  # type: ignore[union-attr]
+        num = bytes(data[pos:end])
+        if b"." in num:
+            return FloatObject(num), end
+        return NumberObject(num), end
+    if tok == b"/":
+        end = NAME_PATTERN.match(data, pos).end()  # type: ignore[union-attr]
+        return NameObject._decode(bytes(data[pos:end]), pdf), end
+    if tok == b"(":
+        return read_string_from_buffer(data, pos, forced_encoding)
+    if tok == b"<":
+        if data[pos + 1 : pos + 2] == b"<":
+            return None
+        return read_hex_string_from_buffer(data, pos, forced_encoding)
+    if tok == b"[":
+        return read_array_from_buffer(data, pos, pdf, forced_encoding)
+    word = data[pos : pos + 4]
+    if word == b"true":
+        return BooleanObject(True), pos + 4
+    if word == b"fals":
+        return BooleanObject(False), pos + 5
+    if word == b"null":
+        return NullObject(), pos + 4
+    if tok == b"e" and data[pos : pos + 6] == b"endobj":
+        return NullObject(), pos + 6
+    return None
+
+
+def read_operator_from_buffer(data: bytes, pos: int) -> tuple[bytes, int]:
+    """Read a content stream operator such as ``Tj`` or ``'``."""
+    end = OPERATOR_PATTERN.match(data, pos).end()  # type: ignore[union-attr]
+    return bytes(data[pos:end]), end
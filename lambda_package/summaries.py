@@ -0,0 +1,159 @@
+"""
+Per-metric summaries of a user's results, kept next to the stats table.
+
+One item per (user_id, metric) holds the latest and previous values, their
+delta, the count and the min/max, so dashboard cards render from one small
+read instead of the full history. They are maintained from the stats table's
+DynamoDB stream, off the request path: inserted rows are folded in, and a
+modified, moved or deleted row rebuilds its metric's summary from the rows
+in the stats table, as does a metric's first summary. Each summary keeps the
+record ids it was built from, so a redelivered stream record, or an insert
+that a rebuild already read from the table, is not counted twice.
+Like normalize.py, the repo root's summaries.py is a symlink to this file.
+"""
+
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from botocore.exceptions import ClientError
+
+from normalize import Row
+
+MAX_ATTEMPTS = 5
+# What the dashboard reads; several are DynamoDB reserved words
+SUMMARY_FIELDS = ('metric', 'latest', 'previous', 'delta', 'count', 'min', 'max', 'unit')
+
+
+def to_number(value):
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation:
+        return None
+    return number if number.is_finite() else None
+
+
+def same_point(a, b):
+    # Whether two Rows count the same in a summary: 750 and 750.0 are one value
+    if a is None or b is None:
+        return a is b
+    return (a.metric, a.unit, a.timestamp) == (b.metric, b.unit, b.timestamp) and to_number(a.value) == to_number(b.value)
+
+
+def fold(summary, row, rid):
+    # Adds one newly inserted normalize.Row to a summary dict, unless its
+    # record id was already counted
+    value = to_number(row.value)
+    if value is None or rid in summary.get('ids', ()):
+        return summary
+    summary['ids'] = summary.get('ids', set()) | {rid}
+    latest = summary.get('latest')
+    previous = summary.get('previous')
+    point = {'value': value, 'ts': row.timestamp}
+    if latest is None or row.timestamp >= latest['ts']:
+        latest, previous = point, latest
+    elif previous is None or row.timestamp >= previous['ts']:
+        previous = point
+    summary['latest'], summary['previous'] = latest, previous
+    summary['count'] = summary.get('count', 0) + 1
+    summary['min'] = min(summary.get('min', value), value)
+    summary['max'] = max(summary.get('max', value), value)
+    summary['unit'] = row.unit or summary.get('unit', '')
+    summary['delta'] = latest['value'] - previous['value'] if previous else Decimal(0)
+    return summary
+
+
+def summarize(user_id, metric, points):
+    # A summary built from scratch from [(Row, record_id)]
+    summary = {'user_id': user_id, 'metric': metric}
+    for row, rid in sorted(points, key=lambda p: p[0].timestamp):
+        fold(summary, row, rid)
+    return summary
+
+
+def query_all(table, **kwargs):
+    items = []
+    while True:
+        resp = table.query(**kwargs)
+        items.extend(resp.get('Items', []))
+        if 'LastEvaluatedKey' not in resp:
+            return items
+        kwargs['ExclusiveStartKey'] = resp['LastEvaluatedKey']
+
+
+def stored_points(stats_table, user_id):
+    # {metric: [(Row, record_id)]} of the rows stored for a user
+    points = defaultdict(list)
+    items = query_all(
+        stats_table,
+        KeyConditionExpression='user_id = :u',
+        ExpressionAttributeValues={':u': user_id},
+        ProjectionExpression='record_id, metric, #v, #u, upload_timestamp',
+        ExpressionAttributeNames={'#v': 'value', '#u': 'unit'},
+        ConsistentRead=True,
+    )
+    for item in items:
+        row = to_row(item)
+        if row is not None:
+            points[row.metric].append((row, item['record_id']))
+    return points
+
+
+def to_row(item):
+    # Row of a stats table item, or None for settings and profile items
+    if 'metric' not in item or 'value' not in item:
+        return None
+    try:
+        ts = int(item.get('upload_timestamp') or 0)
+    except ValueError:
+        return None
+    return Row(item['metric'], item['value'], item.get('original_value', item['value']), item.get('unit', ''), ts)
+
+
+def apply_changes(table, stats_table, user_id, changes):
+    # changes: {metric: [(Row, record_id)] of inserted rows, or None when a row
+    # of that metric was modified or deleted}. Read-modify-write per metric,
+    # guarded by a version number so that concurrent writers retry instead of
+    # losing each other's rows.
+    history = None
+    for metric, points in changes.items():
+        for attempt in range(MAX_ATTEMPTS):
+            item = table.get_item(Key={'user_id': user_id, 'metric': metric}, ConsistentRead=True).get('Item')
+            version = int(item['version']) if item else 0
+            if item is None or points is None:
+                # One history read per call, however many metrics need it
+                if history is None:
+                    history = stored_points(stats_table, user_id)
+                summary = summarize(user_id, metric, history.get(metric, []))
+            else:
+                summary = item
+                for row, rid in points:
+                    fold(summary, row, rid)
+            try:
+                if 'latest' not in summary:
+                    # No numeric rows left
+                    if item:
+                        table.delete_item(Key={'user_id': user_id, 'metric': metric}, ConditionExpression='version = :v', ExpressionAttributeValues={':v': version})
+                elif item:
+                    summary['version'] = version + 1
+                    table.put_item(Item=summary, ConditionExpression='version = :v', ExpressionAttributeValues={':v': version})
+                else:
+                    summary['version'] = 1
+                    table.put_item(Item=summary, ConditionExpression='attribute_not_exists(user_id)')
+                break
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException' or attempt + 1 == MAX_ATTEMPTS:
+                    raise
+                history = None  # the other writer may have seen newer rows
+
+
+def get_summaries(table, user_id):
+    # {metric: summary} for one user, from a single paginated query that
+    # leaves out the record ids
+    items = query_all(
+        table,
+        KeyConditionExpression='user_id = :u',
+        ExpressionAttributeValues={':u': user_id},
+        ProjectionExpression=', '.join('#' + name for name in SUMMARY_FIELDS),
+        ExpressionAttributeNames={'#' + name: name for name in SUMMARY_FIELDS},
+    )
+    return {item['metric']: item for item in items}
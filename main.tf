@@ -61,6 +61,58 @@ resource "aws_dynamodb_table" "health_stats" {
     name = "record_id"
     type = "S"
   }
+  attribute {
+    name = "written_at"
+    type = "N"
+  }
+
+  # Rows by write time, so the dashboard can fetch only what changed since
+  # its last load. upload_timestamp holds the result date, which can be far
+  # older than the write for a newly uploaded report.
+  global_secondary_index {
+    name            = "user_written_at"
+    hash_key        = "user_id"
+    range_key       = "written_at"
+    projection_type = "ALL"
+  }
+
+  # Row changes feed the per-metric summaries (see the stream mapping below)
+  stream_enabled   = true
+  stream_view_type = "NEW_AND_OLD_IMAGES"
+}
+
+# Parsed rows of each ingested PDF, keyed by the SHA-256 of its content, so
+# re-uploads of the same file skip text extraction and Bedrock.
+resource "aws_dynamodb_table" "parse_cache" {
+  name           = "RootHealth_ParseCache"
+  billing_mode   = "PAY_PER_REQUEST"
+  hash_key       = "content_hash"
+  attribute {
+    name = "content_hash"
+    type = "S"
+  }
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+}
+
+# Latest/previous value, delta, count and min/max per user and metric,
+# maintained from the stats table's stream so the dashboard cards need one
+# small query.
+resource "aws_dynamodb_table" "summaries" {
+  name           = "RootHealth_Summaries"
+  billing_mode   = "PAY_PER_REQUEST"
+  hash_key       = "user_id"
+  range_key      = "metric"
+  attribute {
+    name = "user_id"
+    type = "S"
+  }
+  attribute {
+    name = "metric"
+    type = "S"
+  }
 }
 
 resource "aws_dynamodb_table" "supplements" {
@@ -114,9 +166,24 @@ resource "aws_iam_policy" "ingestion_policy" {
     Statement = [
       {
         Effect = "Allow"
-        Action = ["dynamodb:BatchWriteItem", "dynamodb:PutItem"]
+        Action = ["dynamodb:BatchWriteItem", "dynamodb:PutItem", "dynamodb:Query"]
         Resource = aws_dynamodb_table.health_stats.arn
       },
+      {
+        Effect = "Allow"
+        Action = ["dynamodb:GetItem", "dynamodb:PutItem"]
+        Resource = aws_dynamodb_table.parse_cache.arn
+      },
+      {
+        Effect = "Allow"
+        Action = ["dynamodb:GetItem", "dynamodb:PutItem", "dynamodb:DeleteItem"]
+        Resource = aws_dynamodb_table.summaries.arn
+      },
+      {
+        Effect = "Allow"
+        Action = ["dynamodb:DescribeStream", "dynamodb:GetRecords", "dynamodb:GetShardIterator", "dynamodb:ListStreams"]
+        Resource = aws_dynamodb_table.health_stats.stream_arn
+      },
       {
         Effect = "Allow"
         Action = ["s3:GetObject", "s3:ListBucket"]
@@ -136,6 +203,16 @@ resource "aws_iam_policy" "ingestion_policy" {
         Effect = "Allow"
         Action = ["logs:CreateLogGroup", "logs:CreateLogStream", "logs:PutLogEvents"]
         Resource = "arn:aws:logs:*:*:*"
+      },
+      {
+        Effect = "Allow"
+        Action = ["sqs:ReceiveMessage", "sqs:DeleteMessage", "sqs:GetQueueAttributes"]
+        Resource = aws_sqs_queue.ingestion_queue.arn
+      },
+      {
+        Effect = "Allow"
+        Action = ["sqs:SendMessage"]
+        Resource = [aws_sqs_queue.ocr_queue.arn, aws_sqs_queue.stats_stream_dlq.arn]
       }
     ]
   })
@@ -146,9 +223,18 @@ resource "aws_iam_role_policy_attachment" "attach_ingestion" {
   policy_arn = aws_iam_policy.ingestion_policy.arn
 }
 
+# The handler imports pypdf and the shared normalize module, so the whole
+# package directory is deployed
 data "archive_file" "lambda_zip" {
   type        = "zip"
-  source_file = "lambda_function.py"
+  source_dir  = "lambda_package"
+  # Exact paths work with every archive provider version; fileset() expands
+  # the patterns, including bytecode in nested packages and stray wheels
+  excludes    = setunion(
+    fileset("lambda_package", "**/__pycache__/**"),
+    fileset("lambda_package", "**/*.pyc"),
+    fileset("lambda_package", "**/*.whl"),
+  )
   output_path = "lambda_function.zip"
 }
 
@@ -159,30 +245,104 @@ resource "aws_lambda_function" "ingestor" {
   handler       = "lambda_function.lambda_handler"
   runtime       = "python3.11"
   source_code_hash = data.archive_file.lambda_zip.output_base64sha256
-  timeout = 60
+  timeout = 300
+  # Imports take ~65 MB. The ingestor lowers MAX_CONCURRENCY to what fits
+  # next to them (RECORD_MEMORY_MB per record, 2 at 128 MB), and RANGE_CACHE_MB
+  # is split between those records' S3 block caches
+  memory_size = 128
 
   environment {
     variables = {
-      DYNAMODB_TABLE = aws_dynamodb_table.health_stats.name
+      DYNAMODB_TABLE  = aws_dynamodb_table.health_stats.name
+      MAX_CONCURRENCY = "8"
+      RANGE_CACHE_MB  = "16"
+      DEDUP_TABLE     = aws_dynamodb_table.parse_cache.name
+      SUMMARY_TABLE   = aws_dynamodb_table.summaries.name
+      OCR_QUEUE_URL   = aws_sqs_queue.ocr_queue.url
     }
   }
 }
 
-resource "aws_lambda_permission" "allow_s3" {
-  statement_id  = "AllowExecutionFromS3"
-  action        = "lambda:InvokeFunction"
-  function_name = aws_lambda_function.ingestor.function_name
-  principal     = "s3.amazonaws.com"
-  source_arn    = aws_s3_bucket.raw_data.arn
+# Uploads are queued and handed to the ingestor in batches, so a bulk upload
+# runs as a few invocations instead of one per file.
+resource "aws_sqs_queue" "ingestion_dlq" {
+  name                      = "roothealth-ingestion-dlq"
+  message_retention_seconds = 1209600
+}
+
+resource "aws_sqs_queue" "ingestion_queue" {
+  name                       = "roothealth-ingestion-queue"
+  visibility_timeout_seconds = 1800 # 6x the Lambda timeout
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.ingestion_dlq.arn
+    maxReceiveCount     = 3
+  })
+}
+
+# Image-only (scanned) uploads, which have no text layer to parse, are
+# handed to an OCR consumer through this queue.
+resource "aws_sqs_queue" "ocr_queue" {
+  name                      = "roothealth-ocr-queue"
+  message_retention_seconds = 1209600
+}
+
+resource "aws_sqs_queue_policy" "allow_s3" {
+  queue_url = aws_sqs_queue.ingestion_queue.id
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect    = "Allow"
+      Principal = { Service = "s3.amazonaws.com" }
+      Action    = "sqs:SendMessage"
+      Resource  = aws_sqs_queue.ingestion_queue.arn
+      Condition = { ArnEquals = { "aws:SourceArn" = aws_s3_bucket.raw_data.arn } }
+    }]
+  })
 }
 
 resource "aws_s3_bucket_notification" "bucket_notification" {
   bucket = aws_s3_bucket.raw_data.id
-  lambda_function {
-    lambda_function_arn = aws_lambda_function.ingestor.arn
-    events              = ["s3:ObjectCreated:*"]
+  queue {
+    queue_arn     = aws_sqs_queue.ingestion_queue.arn
+    events        = ["s3:ObjectCreated:*"]
+    filter_suffix = ".pdf"
+  }
+  depends_on = [aws_sqs_queue_policy.allow_s3]
+}
+
+resource "aws_lambda_event_source_mapping" "ingestion_queue" {
+  event_source_arn                   = aws_sqs_queue.ingestion_queue.arn
+  function_name                      = aws_lambda_function.ingestor.arn
+  batch_size                         = 10
+  maximum_batching_window_in_seconds = 20
+  function_response_types            = ["ReportBatchItemFailures"]
+}
+
+# The same function keeps the summaries in step with the stats table. A
+# failing stream batch is split in half and retried until the failing record
+# is isolated; after maximum_retry_attempts its shard and sequence numbers go
+# to the DLQ and the shard moves on, instead of blocking for up to a day. A
+# skipped record's summary catches up at its metric's next rebuild (a modified
+# or deleted row), or when the records named in the DLQ message are replayed.
+resource "aws_sqs_queue" "stats_stream_dlq" {
+  name                      = "roothealth-stats-stream-dlq"
+  message_retention_seconds = 1209600
+}
+
+resource "aws_lambda_event_source_mapping" "stats_stream" {
+  event_source_arn                   = aws_dynamodb_table.health_stats.stream_arn
+  function_name                      = aws_lambda_function.ingestor.arn
+  starting_position                  = "TRIM_HORIZON"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 1
+  maximum_retry_attempts             = 5
+  bisect_batch_on_function_error     = true
+
+  destination_config {
+    on_failure {
+      destination_arn = aws_sqs_queue.stats_stream_dlq.arn
+    }
   }
-  depends_on = [aws_lambda_permission.allow_s3]
 }
 
 resource "aws_ecr_repository" "app_repo" {
@@ -242,6 +402,8 @@ resource "aws_iam_role_policy" "eb_app_permissions" {
         ]
         Resource = [
             aws_dynamodb_table.health_stats.arn, 
+            "${aws_dynamodb_table.health_stats.arn}/index/*",
+            aws_dynamodb_table.summaries.arn,
             aws_dynamodb_table.supplements.arn,
             aws_dynamodb_table.relationships.arn
         ]
@@ -291,6 +453,16 @@ resource "aws_elastic_beanstalk_environment" "env" {
     name      = "DYNAMODB_TABLE"
     value     = aws_dynamodb_table.health_stats.name
   }
+  setting {
+    namespace = "aws:elasticbeanstalk:application:environment"
+    name      = "STATS_TIME_INDEX"
+    value     = "user_written_at"
+  }
+  setting {
+    namespace = "aws:elasticbeanstalk:application:environment"
+    name      = "SUMMARY_TABLE"
+    value     = aws_dynamodb_table.summaries.name
+  }
   setting {
     namespace = "aws:elasticbeanstalk:application:environment"
     name      = "AWS_REGION"
@@ -0,0 +1 @@
+lambda_package/normalize.py
\ No newline at end of file
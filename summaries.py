@@ -0,0 +1 @@
+lambda_package/summaries.py
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Shared setup for the ingestor tests.
+
+lambda_function reads its settings and creates its clients on import, so
+the environment is set here, before any test module imports it. Bedrock
+calls go to a local stub (BEDROCK_ENDPOINT_URL) whose responses each test
+scripts; AWS services other than Bedrock are mocked with moto.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda_package"))
+
+
+class BedrockStub(BaseHTTPRequestHandler):
+    # Each call pops the next scripted response: ("throttle",), ("ok", text)
+    # or ("slow", seconds); with nothing scripted it answers "[]"
+    script = []
+    calls = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).calls += 1
+        action = self.script.pop(0) if self.script else ("ok", "[]")
+        if action[0] == "slow":
+            time.sleep(action[1])
+            action = ("ok", "[]")
+        if action[0] == "throttle":
+            self.send_response(429)
+            self.send_header("x-amzn-ErrorType", "ThrottlingException:http://internal.amazon.com/coral/")
+            body = json.dumps({"message": "Too many requests"}).encode()
+        else:
+            self.send_response(200)
+            body = json.dumps({"content": [{"type": "text", "text": action[1]}]}).encode()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except OSError:
+            pass  # the client gave up on a slow response
+
+
+_server = ThreadingHTTPServer(("127.0.0.1", 0), BedrockStub)
+_server.daemon_threads = True
+threading.Thread(target=_server.serve_forever, daemon=True).start()
+
+os.environ.update(
+    AWS_ACCESS_KEY_ID="testing",
+    AWS_SECRET_ACCESS_KEY="testing",
+    AWS_DEFAULT_REGION="us-east-1",
+    DYNAMODB_TABLE="RootHealth_Stats",
+    BEDROCK_ENDPOINT_URL=f"http://127.0.0.1:{_server.server_port}",
+)
+os.environ.pop("DEDUP_TABLE", None)
+
+
+@pytest.fixture
+def bedrock_stub():
+    BedrockStub.script = []
+    BedrockStub.calls = 0
+    return BedrockStub
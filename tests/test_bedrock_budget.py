@@ -0,0 +1,55 @@
+"""Bedrock calls and retries stay within the invocation's time budget."""
+
+import time
+
+import pytest
+
+import lambda_function as lf
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    # Seconds above the margin until the deadline; no real backoff
+    monkeypatch.setattr(lf, "BEDROCK_TIME_MARGIN_MS", 1000)
+    monkeypatch.setattr(lf, "jitter_delay", lambda attempt, base=0.05, cap=5.0: 0.05)
+
+    def set_budget(seconds):
+        monkeypatch.setattr(lf, "invocation_deadline", time.time() + 1 + seconds)
+        return lf.invocation_deadline
+
+    return set_budget
+
+
+def test_throttled_call_is_retried(bedrock_stub, budget):
+    budget(30)
+    bedrock_stub.script = [("throttle",), ("throttle",), ("ok", '[{"metric": "TSH", "value": 1.5, "unit": "mIU/L"}]')]
+    rows = lf.analyze_with_claude("TSH 1.5 mIU/L (throttled)", "uploads/u/a.pdf")
+    assert rows == [{"metric": "TSH", "value": 1.5, "unit": "mIU/L"}]
+    assert bedrock_stub.calls == 3
+
+
+def test_each_attempt_is_a_single_call(bedrock_stub, budget):
+    # botocore must not retry inside a call, or a call could outlast the budget
+    budget(0.3)
+    bedrock_stub.script = [("throttle",)] * 20
+    with pytest.raises(lf.ClientError) as excinfo:
+        lf.analyze_with_claude("TSH 1.5 mIU/L (single)", "uploads/u/a.pdf")
+    assert "max retries: 0" in str(excinfo.value)
+    assert bedrock_stub.calls < 20
+
+
+def test_slow_call_is_cut_at_the_deadline(bedrock_stub, budget):
+    deadline = budget(1.5)
+    bedrock_stub.script = [("slow", 4)] * 3
+    started = time.time()
+    with pytest.raises((lf.ReadTimeoutError, TimeoutError)):
+        lf.analyze_with_claude("TSH 1.5 mIU/L (slow)", "uploads/u/a.pdf")
+    assert time.time() < deadline
+    assert time.time() - started < 2.5
+
+
+def test_no_call_without_budget(bedrock_stub, budget):
+    budget(-0.5)
+    with pytest.raises(TimeoutError):
+        lf.analyze_with_claude("TSH 1.5 mIU/L (late)", "uploads/u/a.pdf")
+    assert bedrock_stub.calls == 0
@@ -0,0 +1,76 @@
+"""S3RangeReader against a moto S3 bucket: same bytes and text as a local read."""
+
+import io
+import os
+import random
+
+import pytest
+
+moto = pytest.importorskip("moto")
+
+import boto3  # noqa: E402
+from pypdf import PdfWriter  # noqa: E402
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject  # noqa: E402
+
+import lambda_function as lf  # noqa: E402
+
+BUCKET = "range-reader-test"
+
+
+def make_pdf(pages=3, attachment_size=2 * 1024 * 1024):
+    # A few pages of Helvetica text and a large, incompressible attachment
+    # that text extraction never needs to read
+    writer = PdfWriter()
+    font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    })
+    for number in range(pages):
+        page = writer.add_blank_page(612, 792)
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 72 720 Td (TSH {number}.5 mIU/L) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): writer._add_object(font)}),
+        })
+    writer.add_attachment("scan.bin", random.Random(0).randbytes(attachment_size))
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+@pytest.fixture
+def s3():
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def test_reads_match_the_object(s3):
+    data = random.Random(1).randbytes(300_000)
+    s3.put_object(Bucket=BUCKET, Key="blob", Body=data)
+    reader = lf.S3RangeReader(s3, BUCKET, "blob", block_size=4096, max_blocks=4)
+    rng = random.Random(2)
+    for _ in range(200):
+        start = rng.randrange(len(data) + 100)
+        length = rng.randrange(20_000)
+        reader.seek(start)
+        assert reader.read(length) == data[start:start + length]
+    reader.seek(-10, os.SEEK_END)
+    assert reader.read() == data[-10:]
+    assert len(reader.blocks) <= 4
+
+
+def test_pdf_text_without_reading_the_whole_object(s3):
+    data = make_pdf()
+    s3.put_object(Bucket=BUCKET, Key="uploads/u/labs.pdf", Body=data)
+    with lf.S3RangeReader(s3, BUCKET, "uploads/u/labs.pdf", block_size=64 * 1024, max_blocks=8) as fh:
+        assert lf.scan_pages(fh) == ["text"] * 3
+        remote = lf.extract_text_from_pdf(fh, "uploads/u/labs.pdf")
+        fetched = fh.bytes_fetched
+    local = lf.extract_text_from_pdf(io.BytesIO(data), "local.pdf")
+    assert remote == local
+    assert "TSH 2.5 mIU/L" in remote[2]
+    assert fetched < len(data) / 4
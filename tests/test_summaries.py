@@ -0,0 +1,28 @@
+"""Folding stream inserts into a summary counts each record once."""
+
+from decimal import Decimal
+
+from normalize import Row
+from summaries import fold, same_point, summarize
+
+
+def row(value, ts):
+    return Row("TSH", str(value), str(value), "mIU/L", ts)
+
+
+def test_redelivered_and_rebuilt_rows_are_not_counted_again():
+    points = [(row(1, 100), "a1"), (row(2, 200), "a2"), (row(3, 300), "a3")]
+    summary = summarize("u", "TSH", points)
+    # The stream delivers the inserts a rebuild has already read, then again
+    for point in points + points:
+        fold(summary, *point)
+    assert summary["count"] == 3
+    assert summary["ids"] == {"a1", "a2", "a3"}
+    assert (summary["latest"]["ts"], summary["previous"]["ts"], summary["delta"]) == (300, 200, Decimal(1))
+
+
+def test_same_point_compares_numbers():
+    assert same_point(row("750", 1), row("750.0", 1))
+    assert not same_point(row("750", 1), row("751", 1))
+    assert not same_point(row("750", 1), row("750", 2))
+    assert same_point(None, None) and not same_point(row(1, 1), None)